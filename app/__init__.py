@@ -21,11 +21,18 @@ def create_app() -> Flask:
     )
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "quizbattle-dev-key-please-change")
 
-    socketio.init_app(app)
+    from .backend import socketio_options
+    socketio.init_app(app, **socketio_options())
 
     from .routes import bp
     app.register_blueprint(bp)
 
     from . import socket_events
+    from . import reaper
+    reaper.start()
+    from . import warmer
+    warmer.start()
+    from . import metrics
+    metrics.start()
 
     return app
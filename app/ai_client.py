@@ -1,14 +1,39 @@
-import os, re, json, random, logging
+import os, re, json, time, random, logging, threading
+from collections import deque
+from types import MappingProxyType
+import eventlet
+from eventlet import tpool
+from eventlet.semaphore import Semaphore
+from eventlet.queue import LightQueue
+from . import metrics
+from .question_bank import QuestionBank
 
 logger = logging.getLogger(__name__)
 
+GEN_WORKERS   = int(os.getenv("GEN_WORKERS", "4"))
+GEN_QUEUE_MAX = int(os.getenv("GEN_QUEUE_MAX", "50"))
+GEN_TIMEOUT   = float(os.getenv("GEN_TIMEOUT", "60"))
+GEN_STREAMING = os.getenv("GEN_STREAMING", "true").lower() == "true"
+GEN_BATCH_SIZE        = int(os.getenv("GEN_BATCH_SIZE", "10"))
+GEN_BATCH_CONCURRENCY = int(os.getenv("GEN_BATCH_CONCURRENCY", "3"))
+CB_FAILURES    = int(os.getenv("GIGACHAT_CB_FAILURES", "3"))
+CB_RESET_AFTER = float(os.getenv("GIGACHAT_CB_RESET", "30"))
+BANK_PATH  = os.getenv("QUESTION_BANK") or os.path.join(os.path.dirname(__file__), "..", "data", "questions.jsonl")
+BANK_FIRST = os.getenv("QUESTION_BANK_FIRST", "true").lower() == "true"
+
+class GenerationQueueFull(RuntimeError):
+    pass
+
+class CircuitOpen(RuntimeError):
+    pass
+
 DIFFICULTY_LABELS = {
     "easy":   "ЛЁГКИЙ — простые факты, известные каждому школьнику",
     "medium": "СРЕДНИЙ — для эрудированного взрослого, требует кругозора",
     "hard":   "СЛОЖНЫЙ — экспертный уровень, глубокие специализированные знания",
 }
 
-def build_prompt(topic: str, count: int, difficulty: str, num_options: int) -> str:
+def build_prompt(topic: str, count: int, difficulty: str, num_options: int, batch=None) -> str:
     diff_label = DIFFICULTY_LABELS.get(difficulty, DIFFICULTY_LABELS["medium"])
     example = json.dumps({
         "questions": [
@@ -25,14 +50,97 @@ def build_prompt(topic: str, count: int, difficulty: str, num_options: int) -> s
         f'2. "correct" — индекс правильного варианта от 0 до {num_options-1}. '
         f'   Нумерация С НУЛЯ: первый = 0, второй = 1, третий = 2, четвёртый = 3.\n'
         f'3. Вопросы должны быть КОРРЕКТНЫМИ — правильный ответ действительно верен.\n'
-        f'4. Ответь ТОЛЬКО валидным JSON, без пояснений и markdown.\n\n'
-        f'Формат:\n{example}\n\n'
+        f'4. Ответь ТОЛЬКО валидным JSON, без пояснений и markdown.\n'
+        + (f'5. Это часть {batch[0]} из {batch[1]} большого набора — бери разные '
+           f'аспекты темы, не ограничивайся самыми известными фактами.\n' if batch else '')
+        + f'\nФормат:\n{example}\n\n'
         f'Создай {count} вопросов по теме "{topic}":'
     )
 
+_RE_FENCE    = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+_RE_TRAILING = re.compile(r',\s*([}\]])')
+_RE_OUTSIDE  = re.compile(r'["{}]')
+_RE_INSIDE   = re.compile(r'["\\]')
+_RE_Q_FIELD  = re.compile(r'"question"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_RE_O_FIELD  = re.compile(r'"options"\s*:\s*\[([\s\S]*?)\]')
+_RE_C_FIELD  = re.compile(r'"correct"\s*:\s*(\d+)')
+_RE_STRING   = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+def _salvage(frag: str) -> dict | None:
+    qm, om = _RE_Q_FIELD.search(frag), _RE_O_FIELD.search(frag)
+    if not qm or not om:
+        return None
+    cm = _RE_C_FIELD.search(frag)
+    return {
+        "question": qm.group(1).replace('\\"', '"'),
+        "options":  [o.replace('\\"', '"') for o in _RE_STRING.findall(om.group(1))],
+        "correct":  int(cm.group(1)) if cm else 0,
+    }
+
+class _QuestionScanner:
+    # Один линейный проход: находит законченные «листовые» объекты {...}
+    # с ключом "question". Строки и экранирование учитываются, всё вне
+    # объектов (```, BOM, пояснения) пропускается, оборванный хвост просто
+    # не попадает в результат. Годится и для потока — feed() по кускам.
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        self.in_str = False
+        self.stack = []
+
+    def feed(self, chunk: str) -> list:
+        self.buf += chunk
+        buf, i, n = self.buf, self.pos, len(self.buf)
+        out = []
+        while i < n:
+            if self.in_str:
+                m = _RE_INSIDE.search(buf, i)
+                if not m:
+                    i = n
+                    break
+                i = m.start()
+                if buf[i] == "\\":
+                    if i + 1 >= n:
+                        break
+                    i += 2
+                    continue
+                self.in_str = False
+                i += 1
+                continue
+            m = _RE_OUTSIDE.search(buf, i)
+            if not m:
+                i = n
+                break
+            i = m.start()
+            ch = buf[i]
+            if ch == '"':
+                self.in_str = True
+            elif ch == "{":
+                if self.stack:
+                    self.stack[-1][1] = True
+                self.stack.append([i, False])
+            elif self.stack:
+                start, nested = self.stack.pop()
+                if not nested and (obj := self._load(buf[start:i+1])):
+                    out.append(obj)
+            i += 1
+        if not self.stack:
+            buf, i = buf[i:], 0
+        self.buf, self.pos = buf, i
+        return out
+
+    @staticmethod
+    def _load(frag: str) -> dict | None:
+        try:
+            obj = json.loads(_RE_TRAILING.sub(r'\1', frag))
+        except json.JSONDecodeError:
+            obj = _salvage(frag)
+        return obj if isinstance(obj, dict) and "question" in obj else None
+
 def _parse_response(raw: str, num_options: int) -> list:
     text = raw.strip().lstrip('\ufeff')
-    cb = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
+    cb = _RE_FENCE.search(text)
     if cb:
         text = cb.group(1).strip()
 
@@ -40,10 +148,8 @@ def _parse_response(raw: str, num_options: int) -> list:
     if s != -1 and e != -1:
         text = text[s:e+1]
 
-    text = re.sub(r',\s*([}\]])', r'\1', text)
-
     try:
-        data = json.loads(text)
+        data = json.loads(_RE_TRAILING.sub(r'\1', text))
         qs = data.get("questions") or next(
             (v for v in data.values()
              if isinstance(v, list) and v
@@ -55,21 +161,10 @@ def _parse_response(raw: str, num_options: int) -> list:
     except json.JSONDecodeError as exc:
         logger.warning("⚠️ json.loads: %s", exc)
 
-    logger.info("🔧 Regex-извлечение...")
-    qs = []
-    for qm, om, cm in zip(
-        re.finditer(r'"question"\s*:\s*"((?:[^"\\]|\\.)*)"', raw),
-        re.finditer(r'"options"\s*:\s*\[([\s\S]*?)\]', raw),
-        re.finditer(r'"correct"\s*:\s*(\d+)', raw),
-    ):
-        q_text  = qm.group(1).replace('\\"', '"')
-        options = [o.replace('\\"', '"') for o in re.findall(r'"((?:[^"\\]|\\.)*)"', om.group(1))]
-        correct = int(cm.group(1))
-        if q_text and len(options) >= 2:
-            qs.append({"question": q_text, "options": options, "correct": correct})
-
+    logger.info("🔧 Поштучное извлечение...")
+    qs = [q for q in _QuestionScanner().feed(raw) if len(q.get("options") or []) >= 2]
     if qs:
-        logger.info("✅ Regex: %d вопросов", len(qs))
+        logger.info("✅ Извлечено: %d вопросов", len(qs))
         return qs
 
     raise ValueError(f"Не удалось разобрать ответ GigaChat: {raw[:100]!r}")
@@ -79,14 +174,14 @@ _BAD_PATTERNS = [
     r'^\s*\.\.\.,\s*$',
     r'^\s*$',
 ]
+_BAD_RE = re.compile("|".join(f"(?:{p})" for p in _BAD_PATTERNS), re.IGNORECASE)
 
 def _is_bad_question(q: dict, num_options: int) -> bool:
     text = q.get("question", "")
     if len(text.strip()) < 10:
         return True
-    for p in _BAD_PATTERNS:
-        if re.match(p, text, re.IGNORECASE):
-            return True
+    if _BAD_RE.match(text):
+        return True
     opts = q.get("options", [])
     if len(set(str(o).strip().lower() for o in opts)) < len(opts):
         return True
@@ -95,13 +190,13 @@ def _is_bad_question(q: dict, num_options: int) -> bool:
     return False
 
 def _fix_and_validate(q: dict, num_options: int) -> dict | None:
-    q = q.copy()
-
-    if not isinstance(q.get("question"), str) or not q["question"].strip():
+    # Возвращает новый неизменяемый вопрос: комнаты и кэш делят один объект.
+    text = q.get("question")
+    if not isinstance(text, str) or not text.strip():
         return None
 
     opts = q.get("options", [])
-    if not isinstance(opts, list):
+    if not isinstance(opts, (list, tuple)):
         return None
     opts = [str(o).strip() for o in opts if str(o).strip()]
     opts = opts[:num_options]
@@ -109,7 +204,6 @@ def _fix_and_validate(q: dict, num_options: int) -> dict | None:
         return None
     while len(opts) < num_options:
         opts.append(f"Вариант {chr(65 + len(opts))}")
-    q["options"] = opts
 
     c = q.get("correct", 0)
     try:
@@ -117,17 +211,26 @@ def _fix_and_validate(q: dict, num_options: int) -> dict | None:
     except (ValueError, TypeError):
         c = 0
 
-    corrects_in_batch = None
     if c < 0 or c >= num_options:
-        logger.warning("⚠️ correct=%d вне диапазона для '%s...' — сбрасываю в 0", c, q["question"][:40])
+        logger.warning("⚠️ correct=%d вне диапазона для '%s...' — сбрасываю в 0", c, text[:40])
         c = 0
-    q["correct"] = c
 
-    if _is_bad_question(q, num_options):
-        logger.warning("⚠️ Плохой вопрос отфильтрован: '%s'", q["question"][:60])
+    fixed = {"question": text, "options": tuple(opts), "correct": c}
+    if _is_bad_question(fixed, num_options):
+        logger.warning("⚠️ Плохой вопрос отфильтрован: '%s'", text[:60])
         return None
 
-    return q
+    return MappingProxyType(fixed)
+
+def adapt_options(q: dict, num_options: int) -> dict | None:
+    # Вопрос из пула под другое число вариантов: лишние неверные выкидываем,
+    # правильный сохраняем; недостающие добьёт _fix_and_validate.
+    opts, c = q.get("options", []), q.get("correct", 0)
+    if len(opts) > num_options and 0 <= c < len(opts):
+        others = [i for i in range(len(opts)) if i != c]
+        keep = sorted([c] + random.sample(others, num_options - 1))
+        q = {**q, "options": [opts[i] for i in keep], "correct": keep.index(c)}
+    return _fix_and_validate(q, num_options)
 
 def _fix_indexing(questions: list, num_options: int) -> list:
     corrects = [q["correct"] for q in questions if isinstance(q.get("correct"), int)]
@@ -140,23 +243,121 @@ def _fix_indexing(questions: list, num_options: int) -> list:
                 q["correct"] -= 1
     return questions
 
-def _call_gigachat(topic: str, count: int, difficulty: str, num_options: int) -> list:
+_bank = QuestionBank(BANK_PATH, validate=_fix_and_validate)
+
+class _CircuitBreaker:
+    # closed → (CB_FAILURES ошибок подряд) → open → (CB_RESET_AFTER с) → half_open:
+    # пропускаем одну пробу; успех закрывает, ошибка снова открывает.
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def blocked(self) -> bool:
+        st = self.state
+        return st == "open" or (st == "half_open" and self.probing)
+
+    def allow(self) -> bool:
+        with self._lock:
+            st = self.state
+            if st == "closed":
+                return True
+            if st == "half_open" and not self.probing:
+                self.probing = True
+                logger.info("🔌 GigaChat: пробный запрос (half-open)")
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("🔌 GigaChat снова доступен — circuit closed")
+            self.failures, self.opened_at, self.probing = 0, None, False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning("🔌 GigaChat недоступен — circuit open на %.0f с", self.reset_after)
+                self.opened_at = time.monotonic()
+
+_breaker = _CircuitBreaker(CB_FAILURES, CB_RESET_AFTER)
+_client = None
+_client_lock = threading.Lock()
+
+def _get_client():
+    # Один долгоживущий клиент: токен переиспользуется до истечения
+    # (обновление на 401 делает сама библиотека), соединения держит пул httpx.
+    global _client
     creds = os.getenv("GIGACHAT_CREDENTIALS", "")
     if not creds:
         raise RuntimeError("GIGACHAT_CREDENTIALS не задан в .env")
+    with _client_lock:
+        if _client is None:
+            from gigachat import GigaChat
+            # Модель явно: gigachat 0.2 без неё отказывается отправлять запрос.
+            _client = GigaChat(credentials=creds, verify_ssl_certs=False, timeout=GEN_TIMEOUT,
+                               model=os.getenv("GIGACHAT_MODEL") or "GigaChat")
+        return _client
 
-    from gigachat import GigaChat
+def _chat(prompt: str):
     from gigachat.models import Chat, Messages, MessagesRole
+    return Chat(messages=[Messages(role=MessagesRole.USER, content=prompt)])
 
-    prompt = build_prompt(topic, count, difficulty, num_options)
+def _call_gigachat(topic: str, count: int, difficulty: str, num_options: int, batch=None) -> list:
+    if not _breaker.allow():
+        raise CircuitOpen("GigaChat временно отключён (circuit open)")
+
+    prompt = build_prompt(topic, count, difficulty, num_options, batch)
     logger.info("📤 GigaChat | тема=%s | кол-во=%d", topic, count)
 
-    with GigaChat(credentials=creds, verify_ssl_certs=False) as gc:
-        resp = gc.chat(Chat(messages=[Messages(role=MessagesRole.USER, content=prompt)]))
+    # Клиент (и токен) — внутри try: иначе сбой на пробе оставил бы
+    # half-open с занятой пробой навсегда.
+    try:
+        resp = _get_client().chat(_chat(prompt))
+    except Exception:
+        _breaker.failure()
+        raise
+    _breaker.success()
 
     text = resp.choices[0].message.content
     logger.info("📥 Ответ: %d символов", len(text))
-    return _parse_response(text, num_options)
+    t0 = time.perf_counter()
+    qs = _parse_response(text, num_options)
+    metrics.PARSE.observe(time.perf_counter() - t0)
+    return qs
+
+def _stream_gigachat(topic: str, count: int, difficulty: str, num_options: int):
+    if not _breaker.allow():
+        raise CircuitOpen("GigaChat временно отключён (circuit open)")
+
+    prompt = build_prompt(topic, count, difficulty, num_options)
+    logger.info("📤 GigaChat (stream) | тема=%s | кол-во=%d", topic, count)
+
+    parser = _QuestionScanner()
+    try:
+        for chunk in tpool.Proxy(_get_client().stream(_chat(prompt))):
+            if chunk.choices:
+                yield from parser.feed(chunk.choices[0].delta.content or "")
+    except GeneratorExit:
+        _breaker.success()
+        raise
+    except Exception:
+        _breaker.failure()
+        raise
+    _breaker.success()
 
 _FALLBACK = [
     {"question": "Сколько планет в Солнечной системе?",        "options": ["6","7","8","9"],                                "correct": 2},
@@ -176,24 +377,345 @@ _FALLBACK = [
     {"question": "В каком году Гагарин полетел в космос?",      "options": ["1957","1959","1961","1963"],                    "correct": 2},
 ]
 
-def generate_questions(topic: str, count: int, difficulty: str, num_options: int) -> list:
+def _qkey(q: dict) -> str:
+    return " ".join(q["question"].lower().split())
+
+def _generate_batch(topic: str, count: int, difficulty: str, num_options: int, batch=None) -> list:
+    raw_qs = _call_gigachat(topic, count, difficulty, num_options, batch)
+    raw_qs = _fix_indexing(raw_qs, num_options)
+    qs = [_fix_and_validate(q, num_options) for q in raw_qs]
+    qs = [q for q in qs if q is not None]
+    logger.info("✅ После фильтрации: %d вопросов (было %d)", len(qs), len(raw_qs))
+    return qs
+
+def _budget(batches: int) -> float:
+    # Общий бюджет генерации: по GEN_TIMEOUT на каждую волну из
+    # GEN_BATCH_CONCURRENCY параллельных партий (GEN_BUDGET задаёт явно).
+    waves = -(-batches // GEN_BATCH_CONCURRENCY)
+    return float(os.getenv("GEN_BUDGET") or GEN_TIMEOUT * waves + 5)
+
+def _generate_batched(topic: str, count: int, difficulty: str, num_options: int, running: list) -> list:
+    # Вызывается из гринлета. Большой набор режем на партии по GEN_BATCH_SIZE,
+    # каждая партия — свой вызов GigaChat в потоке tpool, одновременно не больше
+    # GEN_BATCH_CONCURRENCY; битый JSON теряет только свою партию. Недобравшие
+    # партии (и только они, на недостающее число новых вопросов)
+    # перезапрашиваются один раз, пока есть бюджет.
+    # Все партии делят один дедлайн: не начатая к нему партия отменяется,
+    # начатые дорабатывают в фоне — их гринлеты остаются в running, чтобы
+    # вызывающий держал слот генерации до их конца.
+    sizes = [GEN_BATCH_SIZE] * (count // GEN_BATCH_SIZE)
+    if count % GEN_BATCH_SIZE:
+        sizes.append(count % GEN_BATCH_SIZE)
+    deadline = time.monotonic() + _budget(len(sizes))
+    sem = Semaphore(GEN_BATCH_CONCURRENCY)
+    qs, seen = [], set()
+
+    def batch(n, part):
+        with sem:
+            if time.monotonic() >= deadline:
+                return None
+            try:
+                return tpool.execute(_generate_batch, topic, n, difficulty, num_options, part)
+            except Exception as e:
+                logger.warning("⚠️ Партия из %d не удалась: %s", n, e)
+                return []
+
+    def run(jobs):
+        short = []
+        gts = [(n, eventlet.spawn(batch, n, part)) for n, part in jobs]
+        running.extend(gt for _, gt in gts)
+        for n, gt in gts:
+            got = None
+            with eventlet.Timeout(max(0.0, deadline - time.monotonic()), False):
+                got = gt.wait()
+            if got is None:
+                logger.warning("⚠️ Партия из %d не уложилась в бюджет генерации", n)
+                got = []
+            added = 0
+            for q in got:
+                k = _qkey(q)
+                if k not in seen:
+                    seen.add(k)
+                    qs.append(q)
+                    added += 1
+            # Недобор — и повторы уже полученных вопросов из других партий.
+            if added < n:
+                short.append(n - added)
+        return short
+
+    if len(sizes) == 1:
+        run([(count, None)])
+        return qs[:count]
+    short = run([(n, (i + 1, len(sizes))) for i, n in enumerate(sizes)])
+    if short and len(qs) < count and time.monotonic() < deadline:
+        logger.info("🔁 Дозапрос %d недобравших партий", len(short))
+        run([(n, (i + 1, len(short))) for i, n in enumerate(short)])
+    return qs[:count]
+
+def generate_questions(topic: str, count: int, difficulty: str, num_options: int, fallback=True,
+                       running=None) -> list:
+    # Вызывать из гринлета: GigaChat опрашивается в потоках tpool.
+    # running — список, куда попадут гринлеты ещё идущих партий.
+    t0 = time.perf_counter()
     if os.getenv("GIGACHAT_CREDENTIALS"):
-        try:
-            raw_qs = _call_gigachat(topic, count, difficulty, num_options)
-            raw_qs = _fix_indexing(raw_qs, num_options)
-            qs = [_fix_and_validate(q, num_options) for q in raw_qs]
-            qs = [q for q in qs if q is not None]
-            if qs:
-                logger.info("✅ Итого после фильтрации: %d вопросов (было %d)", len(qs), len(raw_qs))
-                return qs
-            logger.warning("⚠️ Все вопросы отфильтрованы — fallback")
-        except Exception as e:
-            logger.warning("⚠️ GigaChat ошибка: %s — fallback", e)
+        qs = _generate_batched(topic, count, difficulty, num_options,
+                               running if running is not None else [])
+        if qs:
+            logger.info("✅ Итого: %d вопросов из %d", len(qs), count)
+            metrics.GENERATION.observe(time.perf_counter() - t0, "gigachat")
+            return qs
+        logger.warning("⚠️ GigaChat не дал вопросов — fallback")
+
+    if not fallback:
+        return []
+    qs = _fallback_questions(count, num_options, topic, difficulty)
+    metrics.GENERATION.observe(time.perf_counter() - t0, "fallback")
+    return qs
+
+def _shuffled(q: dict) -> dict:
+    # В банке и _FALLBACK правильный вариант чаще всего второй —
+    # перемешиваем варианты при выдаче, пересчитывая correct.
+    opts, c = list(q.get("options", [])), q.get("correct", 0)
+    if not isinstance(c, int) or not 0 <= c < len(opts):
+        return q
+    order = random.sample(range(len(opts)), len(opts))
+    return {**q, "options": [opts[i] for i in order], "correct": order.index(c)}
+
+def bank_questions(topic: str, count: int, difficulty: str, num_options: int, strict=False) -> list | None:
+    qs = _bank.sample(topic, count, difficulty, strict)
+    if not qs:
+        return None
+    return [q for q in (adapt_options(_shuffled(q), num_options) for q in qs) if q]
 
+def bank_covers(topic: str, count: int, difficulty: str = "medium") -> bool:
+    return _bank.covers(topic, count, difficulty)
+
+def _fallback_questions(count: int, num_options: int, topic: str = "", difficulty: str = "medium") -> list:
+    # Банк вопросов по теме с добором из остальных; без файла банка — _FALLBACK.
+    # Вопросов может оказаться меньше count, но без повторов.
     logger.warning("⚠️ Используется встроенный банк вопросов")
-    pool = _FALLBACK * (count // len(_FALLBACK) + 1)
-    qs = random.sample(pool, min(count, len(pool)))
+    qs = bank_questions(topic, count, difficulty, num_options)
+    if qs:
+        return qs
+    qs = [_shuffled(q) for q in random.sample(_FALLBACK, min(count, len(_FALLBACK)))]
     return [_fix_and_validate(q, num_options) or q for q in qs]
 
+_gen_active = 0
+_gen_queue: deque = deque()
+
+def _acquire_slot(on_queue=None):
+    global _gen_active
+    if _gen_active < GEN_WORKERS and not _gen_queue:
+        _gen_active += 1
+        return
+    if len(_gen_queue) >= GEN_QUEUE_MAX:
+        raise GenerationQueueFull(f"очередь генерации заполнена ({GEN_QUEUE_MAX})")
+    waiter = LightQueue()
+    _gen_queue.append(waiter)
+    try:
+        pos = len(_gen_queue)
+        if on_queue:
+            on_queue(pos)
+        while not waiter.get():
+            if on_queue and waiter in _gen_queue and _gen_queue.index(waiter) + 1 != pos:
+                pos = _gen_queue.index(waiter) + 1
+                on_queue(pos)
+    except BaseException:
+        if waiter in _gen_queue:
+            _gen_queue.remove(waiter)
+        else:
+            _release_slot()
+        raise
+
+def _release_slot():
+    global _gen_active
+    if not _gen_queue:
+        _gen_active -= 1
+        return
+    _gen_queue.popleft().put(True)
+    for w in _gen_queue:
+        w.put(False)
+
+def fallback_questions(topic: str, count: int, difficulty: str, num_options: int) -> list:
+    t0 = time.perf_counter()
+    qs = _fallback_questions(count, num_options, topic, difficulty)
+    metrics.GENERATION.observe(time.perf_counter() - t0, "fallback")
+    return qs
+
+def _release_after(running):
+    for gt in running:
+        gt.wait()
+    _release_slot()
+
+def _generate_in_slot(topic: str, count: int, difficulty: str, num_options: int, fallback: bool) -> list:
+    # Слот уже занят. Отпускаем его, только когда закончились все начатые
+    # вызовы GigaChat, — даже если ответ ушёл по дедлайну без них: иначе
+    # одновременно шло бы больше GEN_WORKERS генераций.
+    running = []
+    try:
+        return generate_questions(topic, count, difficulty, num_options, fallback, running)
+    finally:
+        if any(not gt.dead for gt in running):
+            logger.warning("⏳ Ещё идут партии: %d — слот освободится после них",
+                           sum(not gt.dead for gt in running))
+            eventlet.spawn_n(_release_after, running)
+        else:
+            _release_slot()
+
+def generate_questions_pooled(topic: str, count: int, difficulty: str, num_options: int,
+                              on_queue=None, fallback=True) -> list:
+    # Блокирующий HTTP к GigaChat уходит в поток tpool, чтобы не стопорить хаб;
+    # одновременно не больше GEN_WORKERS генераций, остальные ждут в очереди.
+    # fallback=False: только ответ GigaChat, при неудаче — [] (для кэша).
+    if not os.getenv("GIGACHAT_CREDENTIALS"):
+        return generate_questions(topic, count, difficulty, num_options, fallback)
+    if _breaker.blocked():
+        logger.warning("🔌 GigaChat circuit %s — сразу fallback", _breaker.state)
+        return fallback_questions(topic, count, difficulty, num_options) if fallback else []
+
+    _acquire_slot(on_queue)
+    return _generate_in_slot(topic, count, difficulty, num_options, fallback)
+
+def generation_idle() -> bool:
+    return _gen_active == 0 and not _gen_queue
+
+def pregenerate(topic: str, count: int, difficulty: str, num_options: int) -> list:
+    # Генерация про запас: только когда есть свободный слот, очередь пуста
+    # и GigaChat здоров; встроенный банк не подставляется — пусто значит пусто.
+    if not os.getenv("GIGACHAT_CREDENTIALS") or _breaker.state != "closed" or not generation_idle():
+        return []
+    _acquire_slot()
+    return _generate_in_slot(topic, count, difficulty, num_options, False)
+
+def stream_questions(topic: str, count: int, difficulty: str, num_options: int, on_queue=None,
+                     fallback=True):
+    # Отдаёт вопросы по мере разбора потока GigaChat. Если поток не дал
+    # ни одного вопроса — отдаёт встроенный банк (при fallback=False — ничего);
+    # если дал меньше — просто заканчивается раньше.
+    n, t0 = 0, time.perf_counter()
+    if os.getenv("GIGACHAT_CREDENTIALS") and not _breaker.blocked():
+        seen, pending, one_based = set(), [], None
+
+        def ready(raws, shift):
+            out = []
+            for raw in raws:
+                c = raw.get("correct")
+                if shift and isinstance(c, int):
+                    raw = {**raw, "correct": c - 1}
+                q = _fix_and_validate(raw, num_options)
+                if q is not None and _qkey(q) not in seen:
+                    seen.add(_qkey(q))
+                    out.append(q)
+            return out
+
+        # Вопросы копятся в pending, пока нумерация не определится: correct == 0
+        # значит 0-based, correct == num_options — 1-based. До этого отдавать
+        # нельзя — в 1-based потоке правильным показался бы соседний вариант.
+        _acquire_slot(on_queue)
+        try:
+            for raw in _stream_gigachat(topic, count, difficulty, num_options):
+                c = raw.get("correct")
+                if isinstance(c, int) and one_based is None:
+                    if c == 0:
+                        one_based = False
+                    elif c == num_options:
+                        one_based = True
+                        logger.info("🔧 1-based нумерация в потоке → конвертирую в 0-based")
+                pending.append(raw)
+                if one_based is None:
+                    continue
+                out, pending = ready(pending, one_based), []
+                for q in out[:count - n]:
+                    n += 1
+                    yield q
+                if n >= count:
+                    break
+        except Exception as e:
+            logger.warning("⚠️ GigaChat stream ошибка после %d вопросов: %s", n, e)
+        finally:
+            _release_slot()
+        if pending and n < count:
+            # Поток кончился, а нумерация не определилась — решаем по всему
+            # остатку, как _fix_indexing для обычного ответа.
+            for q in ready(_fix_indexing(pending, num_options), False)[:count - n]:
+                n += 1
+                yield q
+        if n:
+            logger.info("✅ Поток: %d вопросов из %d", n, count)
+            metrics.GENERATION.observe(time.perf_counter() - t0, "gigachat")
+            return
+    if fallback:
+        yield from fallback_questions(topic, count, difficulty, num_options)
+
 def active_backend() -> str:
-    return "GigaChat (Сбербанк) ✅" if os.getenv("GIGACHAT_CREDENTIALS") else "Fallback (встроенный банк)"
+    if not os.getenv("GIGACHAT_CREDENTIALS"):
+        return "Fallback (встроенный банк)"
+    return "GigaChat (Сбербанк) ✅" if _breaker.state == "closed" else f"GigaChat (circuit {_breaker.state})"
+
+def _bench_batches(count=50, rounds=3):
+    # Партии против одного вызова на count вопросов на подставном GigaChat
+    # (app/fake_gigachat.py): ответ модели ограничен по длине и печатается с
+    # конечной скоростью, часть вопросов с повтором варианта, темы повторяются.
+    # Время до результата и сколько вопросов прошло проверку и дедупликацию.
+    global GEN_BATCH_SIZE, _client
+    from .fake_gigachat import FakeGigaChat
+    fake = FakeGigaChat(latency=0.3, speed=6000, max_chars=6000, pool=300, bad=0.05).start()
+    os.environ.update(fake.env())
+    print(f"{count} вопросов, среднее по {rounds} прогонам:")
+    for name, size in (("один вызов", count), (f"партии по {GEN_BATCH_SIZE}", GEN_BATCH_SIZE)):
+        GEN_BATCH_SIZE, calls, got, dt = size, fake.chats, 0, 0.0
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            got += len(_generate_batched("История", count, "medium", 4, []))
+            dt += time.perf_counter() - t0
+        print(f"  {name:<14} {dt / rounds:5.2f} с, вопросов {got / rounds:5.1f} из {count}, "
+              f"вызовов {(fake.chats - calls) / rounds:4.1f}")
+    _client.close()
+    fake.stop()
+
+
+if __name__ == "__main__":
+    # Разбор записанных «грязных» ответов (data/gigachat_responses.jsonl):
+    # сколько вопросов спасено против ожидаемого и пропускная способность.
+    # Второй столбец — тот же ответ через _QuestionScanner кусками по 64 символа,
+    # как в потоке. С аргументом batch [вопросов] — замер партий.
+    import sys
+    logging.disable(logging.WARNING)
+    if sys.argv[1:2] == ["batch"]:
+        _bench_batches(*map(int, sys.argv[2:]))
+        sys.exit()
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "data",
+                                                               "gigachat_responses.jsonl")
+    with open(path, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    def recover(text, num_options):
+        try:
+            raw = _parse_response(text, num_options)
+        except ValueError:
+            return []
+        return [q for q in (_fix_and_validate(r, num_options) for r in _fix_indexing(raw, num_options)) if q]
+
+    def streamed(text, num_options):
+        sc = _QuestionScanner()
+        raw = [r for i in range(0, len(text), 64) for r in sc.feed(text[i:i + 64])]
+        return [q for q in (_fix_and_validate(r, num_options) for r in _fix_indexing(raw, num_options)) if q]
+
+    got = exp = got_s = 0
+    print(f"{'ответ':<24}{'ждём':>6}{'целиком':>9}{'поток':>7}")
+    for c in corpus:
+        a, b = len(recover(c["text"], c["num_options"])), len(streamed(c["text"], c["num_options"]))
+        got, exp, got_s = got + min(a, c["expected"]), exp + c["expected"], got_s + min(b, c["expected"])
+        mark = "" if a >= c["expected"] else "  <-- недобор"
+        print(f"{c['case']:<24}{c['expected']:>6}{a:>9}{b:>7}{mark}")
+    print(f"Спасено: {got}/{exp} целиком, {got_s}/{exp} потоком")
+
+    size = sum(len(c["text"].encode()) for c in corpus)
+    rounds = 200
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for c in corpus:
+            recover(c["text"], c["num_options"])
+    dt = (time.perf_counter() - t0) / rounds
+    print(f"Разбор: {dt * 1000:.2f} мс на корпус ({len(corpus)} ответов, {size / 1024:.1f} КБ), "
+          f"{size / dt / 2**20:.1f} МБ/с")
@@ -0,0 +1,172 @@
+import os, glob, zlib, pickle, struct, logging
+import eventlet
+from eventlet.green import socket
+from eventlet.queue import LightQueue
+from eventlet.semaphore import Semaphore
+import socketio as _sio
+
+logger = logging.getLogger(__name__)
+
+# Шардирование комнат по процессам. Каждый воркер запускается со своим
+# WORKER_INDEX из WORKER_COUNT и владеет комнатами, чей код попадает в его
+# шард: состояние комнаты и её таймеры живут только у владельца. Событие
+# сокета, пришедшее на чужой воркер, пересылается владельцу через очередь,
+# а рассылки Socket.IO расходятся по всем воркерам через ту же очередь.
+WORKER_COUNT  = int(os.getenv("WORKER_COUNT", "1"))
+WORKER_INDEX  = int(os.getenv("WORKER_INDEX", "0"))
+MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+
+_handlers: dict = {}
+_sid_code: dict = {}
+_pending: dict = {}
+_manager = None
+
+
+def shard_of(code: str) -> int:
+    return zlib.crc32(code.encode()) % WORKER_COUNT
+
+
+def owns(code: str) -> bool:
+    return shard_of(code) == WORKER_INDEX
+
+
+def handler(event):
+    def deco(fn):
+        _handlers[event] = fn
+        return fn
+    return deco
+
+
+def route(event, sid, data=None, code=None):
+    # Вызывает обработчик у воркера-владельца комнаты. code передаётся
+    # явно для join_room, иначе берётся из комнаты, куда этот сокет вошёл.
+    # Вход в комнату засчитывается (и старая комната покидается) только
+    # когда владелец его принял: опечатка в коде не выбивает из комнаты.
+    if code:
+        if _manager is None or owns(code):
+            if _handlers[event](sid, data):
+                _joined(sid, code)
+            return
+        _pending[sid] = code
+        return _manager.forward(shard_of(code), event, sid, data, code)
+    code = _sid_code.get(sid)
+    if event == "disconnect" and (pending := _pending.pop(sid, None)):
+        # Вход ещё в пути — владелец мог его уже принять.
+        _call(event, sid, data, pending)
+    if event in ("disconnect", "leave_room"):
+        _sid_code.pop(sid, None)
+    return _call(event, sid, data, code)
+
+
+def _joined(sid, code):
+    # Владелец принял join_room: дальше события сокета идут к нему, а из
+    # старой комнаты у другого воркера выходим там (в пределах одного
+    # воркера это делает сам join_room).
+    _pending.pop(sid, None)
+    old = _sid_code.get(sid)
+    _sid_code[sid] = code
+    if old and old != code and _manager is not None and shard_of(old) != shard_of(code):
+        _call("leave_room", sid, None, old)
+
+
+def _call(event, sid, data, code):
+    if code is None or _manager is None or owns(code):
+        return _handlers[event](sid, data)
+    _manager.forward(shard_of(code), event, sid, data, code)
+
+
+def _dispatch(message):
+    event, sid, code = message["event"], message["sid"], message.get("code")
+    try:
+        if event == "joined":
+            return _joined(sid, code)
+        ok = _handlers[event](sid, message["data"])
+        if event == "join_room" and ok:
+            _manager.forward(message["origin"], "joined", sid, None, code)
+    except Exception:
+        logger.exception("Ошибка в пересланном событии %s", event)
+
+
+class LocalQueueManager(_sio.PubSubManager):
+    # Очередь сообщений без внешнего брокера: каждый воркер слушает
+    # unix-сокет <dir>/worker-N.sock, публикация — кадры pickle с длиной
+    # всем соседям. Каталог создаётся с правами 0700.
+    name = "localqueue"
+
+    def __init__(self, url, channel="socketio", write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.dir = url.split("://", 1)[1]
+        os.makedirs(self.dir, mode=0o700, exist_ok=True)
+        self.path = self._path(WORKER_INDEX)
+        self._peers: dict = {}
+        self._inbox = LightQueue()
+
+    def _path(self, index):
+        return os.path.join(self.dir, f"worker-{index}.sock")
+
+    def forward(self, index, event, sid, data, code=None):
+        self._send(self._path(index), {"method": "qb_forward", "event": event, "sid": sid,
+                                       "data": data, "code": code, "origin": WORKER_INDEX,
+                                       "host_id": self.host_id})
+
+    def _publish(self, data):
+        for path in glob.glob(os.path.join(self.dir, "worker-*.sock")):
+            if path != self.path:
+                self._send(path, data)
+
+    def _send(self, path, data):
+        frame = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        peer = self._peers.get(path)
+        try:
+            if peer is None:
+                conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conn.connect(path)
+                peer = self._peers[path] = (conn, Semaphore())
+            with peer[1]:
+                peer[0].sendall(struct.pack("!I", len(frame)) + frame)
+        except OSError as exc:
+            logger.warning("Очередь: воркер %s недоступен: %s", path, exc)
+            self._peers.pop(path, None)
+
+    def _serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        srv.bind(self.path)
+        srv.listen(64)
+        while True:
+            conn, _ = srv.accept()
+            eventlet.spawn_n(self._read, conn)
+
+    def _read(self, conn):
+        f = conn.makefile("rb")
+        try:
+            while True:
+                head = f.read(4)
+                if len(head) < 4:
+                    return
+                (n,) = struct.unpack("!I", head)
+                self._inbox.put(pickle.loads(f.read(n)))
+        finally:
+            conn.close()
+
+    def _listen(self):
+        eventlet.spawn_n(self._serve)
+        while True:
+            message = self._inbox.get()
+            if message.get("method") == "qb_forward":
+                eventlet.spawn_n(_dispatch, message)
+                continue
+            yield message
+
+
+def socketio_options() -> dict:
+    global _manager
+    if WORKER_COUNT <= 1:
+        return {}
+    if not MESSAGE_QUEUE.startswith("local://"):
+        raise RuntimeError("WORKER_COUNT > 1 требует SOCKETIO_MESSAGE_QUEUE=local:///путь/к/каталогу")
+    if not 0 <= WORKER_INDEX < WORKER_COUNT:
+        raise RuntimeError(f"WORKER_INDEX должен быть от 0 до {WORKER_COUNT - 1}")
+    _manager = LocalQueueManager(MESSAGE_QUEUE)
+    return {"client_manager": _manager}
@@ -0,0 +1,126 @@
+import json, time, sqlite3, logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionCache:
+    # Память (LRU + TTL, лимит по числу вопросов) поверх SQLite-файла,
+    # который переживает рестарт. Из файла читаем лениво — на промахе памяти.
+
+    def __init__(self, ttl=3600, max_questions=5000, db_path=None, decode=None):
+        self.ttl = ttl
+        self.decode = decode
+        self.max_questions = max_questions
+        self.db_path = db_path
+        self._mem: OrderedDict = OrderedDict()
+        self._size = 0
+        self._db = None
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def _conn(self):
+        if self._db is None and self.db_path:
+            try:
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS questions ("
+                    " key TEXT PRIMARY KEY, ts REAL NOT NULL, data TEXT NOT NULL)"
+                )
+                self._db.execute("DELETE FROM questions WHERE ts < ?", (time.time() - self.ttl,))
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("⚠️ Кэш на диске недоступен (%s): %s", self.db_path, exc)
+                self.db_path = None
+                self._db = None
+        return self._db
+
+    @staticmethod
+    def _dkey(key):
+        return json.dumps(list(key), ensure_ascii=False)
+
+    def _put_mem(self, key, ts, questions):
+        if key in self._mem:
+            self._size -= len(self._mem.pop(key)[1])
+        self._mem[key] = (ts, questions)
+        self._size += len(questions)
+        while self._size > self.max_questions and len(self._mem) > 1:
+            _, (_, old) = self._mem.popitem(last=False)
+            self._size -= len(old)
+            self.stats["evictions"] += 1
+
+    def _drop_mem(self, key):
+        self._size -= len(self._mem.pop(key)[1])
+
+    def get(self, key):
+        now = time.time()
+        item = self._mem.get(key)
+        if item:
+            if now - item[0] < self.ttl:
+                self._mem.move_to_end(key)
+                self.stats["hits"] += 1
+                return item[1]
+            self._drop_mem(key)
+            self.stats["expired"] += 1
+
+        db = self._conn()
+        if db:
+            try:
+                row = db.execute("SELECT ts, data FROM questions WHERE key = ?",
+                                 (self._dkey(key),)).fetchone()
+            except sqlite3.Error as exc:
+                logger.warning("⚠️ Кэш на диске: %s", exc)
+                row = None
+            if row and now - row[0] < self.ttl:
+                questions = json.loads(row[1])
+                if self.decode:
+                    questions = self.decode(questions)
+                self._put_mem(key, row[0], questions)
+                self.stats["disk_hits"] += 1
+                return questions
+
+        self.stats["misses"] += 1
+        return None
+
+    def peek(self, key):
+        # Без учёта в статистике и порядке LRU — для фоновых проверок.
+        item = self._mem.get(key)
+        if item and time.time() - item[0] < self.ttl:
+            return item[1]
+        return None
+
+    def set(self, key, questions):
+        ts = time.time()
+        self._put_mem(key, ts, questions)
+        db = self._conn()
+        if db:
+            try:
+                db.execute("INSERT OR REPLACE INTO questions (key, ts, data) VALUES (?, ?, ?)",
+                           (self._dkey(key), ts, json.dumps(questions, ensure_ascii=False, default=dict)))
+                db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("⚠️ Кэш на диске: %s", exc)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        stale = [k for k, (ts, _) in self._mem.items() if ts < cutoff]
+        for k in stale:
+            self._drop_mem(k)
+        self.stats["expired"] += len(stale)
+        db = self._conn()
+        if db:
+            try:
+                db.execute("DELETE FROM questions WHERE ts < ?", (cutoff,))
+                db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("⚠️ Кэш на диске: %s", exc)
+        return len(stale)
+
+    def info(self):
+        return {**self.stats, "entries": len(self._mem), "questions": self._size}
+
+    def __len__(self):
+        return len(self._mem)
+
+    def clear(self):
+        self._mem.clear()
+        self._size = 0
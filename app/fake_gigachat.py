@@ -0,0 +1,127 @@
+import json, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGigaChat:
+    # Подставной GigaChat на localhost для тестов и замеров: /oauth выдаёт
+    # токен, /chat/completions отвечает вопросами — целиком или SSE-потоком.
+    # Вопросы берутся из пула в pool штук (как у настоящей модели, разные
+    # партии повторяются), доля bad — с повтором варианта (их отсеивает
+    # _fix_and_validate); ответ длиннее max_chars обрывается, время ответа —
+    # latency + длина / speed.
+    # status != 200 — все запросы к чату падают с этим кодом.
+
+    def __init__(self, latency=0.0, speed=None, max_chars=None, pool=1000, bad=0.0,
+                 token_ttl=1800, seed=0):
+        self.latency, self.speed, self.max_chars = latency, speed, max_chars
+        self.pool, self.bad, self.token_ttl = pool, bad, token_ttl
+        self.status = 200
+        self.tokens = 0
+        self.chats = 0
+        self.unauthorized = 0
+        self._token = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def env(self):
+        # Переменные окружения, с которыми клиент gigachat пойдёт сюда.
+        return {"GIGACHAT_CREDENTIALS": "dGVzdDp0ZXN0", "GIGACHAT_BASE_URL": f"{self.url}/v1",
+                "GIGACHAT_AUTH_URL": f"{self.url}/oauth"}
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.endswith("/oauth"):
+                    return self._json(200, fake._issue_token())
+                if not self.path.endswith("/chat/completions"):
+                    return self._json(404, {"message": "not found"})
+                if self.headers.get("Authorization") != f"Bearer {fake._token}":
+                    with fake._lock:
+                        fake.unauthorized += 1
+                    return self._json(401, {"message": "token expired"})
+                with fake._lock:
+                    fake.chats += 1
+                if fake.status != 200:
+                    return self._json(fake.status, {"message": "backend unavailable"})
+                req = json.loads(body)
+                text = fake.reply(req["messages"][-1]["content"])
+                if req.get("stream"):
+                    return self._stream(text)
+                fake._wait(text)
+                self._json(200, {
+                    "choices": [{"message": {"role": "assistant", "content": text},
+                                 "index": 0, "finish_reason": "stop"}],
+                    "created": int(time.time()), "model": "GigaChat", "object": "chat.completion",
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                })
+
+            def _json(self, code, data):
+                raw = json.dumps(data, ensure_ascii=False).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _stream(self, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                time.sleep(fake.latency)
+                for i in range(0, len(text), 64):
+                    part = text[i:i + 64]
+                    if fake.speed:
+                        time.sleep(len(part) / fake.speed)
+                    chunk = {"choices": [{"delta": {"content": part}, "index": 0}],
+                             "created": int(time.time()), "model": "GigaChat",
+                             "object": "chat.completion"}
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _issue_token(self):
+        with self._lock:
+            self.tokens += 1
+            self._token = f"tok-{self.tokens}"
+            return {"access_token": self._token, "expires_at": int((time.time() + self.token_ttl) * 1000)}
+
+    def _wait(self, text):
+        time.sleep(self.latency + (len(text) / self.speed if self.speed else 0))
+
+    def reply(self, prompt):
+        # Ответ на промпт build_prompt: РОВНО n вопросов на тему из пула.
+        n = int(re.search(r"РОВНО (\d+) вопросов", prompt).group(1))
+        k = int(re.search(r"РОВНО (\d+) вариантов", prompt).group(1))
+        topic = re.search(r'по теме "([^"]*)"', prompt).group(1)
+        with self._lock:
+            picks = [(self._rng.randrange(self.pool), self._rng.random() < self.bad) for _ in range(n)]
+        qs = [{"question": f"{topic}: факт №{i}?",
+               "options": [f"вариант {0 if bad and j else j} к №{i}" for j in range(k)],
+               "correct": i % k}
+              for i, bad in picks]
+        text = json.dumps({"questions": qs}, ensure_ascii=False)
+        return text[:self.max_chars] if self.max_chars else text
@@ -1,27 +1,76 @@
-import random, string, time
+import os, random, string, time, itertools
 from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Optional
+from .cache import QuestionCache
+from .leaderboard import Leaderboard
+from .ai_client import adapt_options
+from .backend import owns
+from .topics import normalize_topic
 
 SCORE_MULT   = {"easy": 1.0, "medium": 1.5, "hard": 2.0}
 BASE_SCORE   = 100
 TIME_BONUS   = 50
 MAX_TIME     = 30.0
 
-_CACHE: dict = {}
 CACHE_TTL = 3600
 
+def _stamped(q, ts):
+    return MappingProxyType({**q, "ts": ts})
+
+def _decode_pool(qs):
+    # С диска: вопрос заново через adapt_options, метка времени сохраняется
+    # (у записей без неё ts=0 — они сразу считаются устаревшими).
+    return [_stamped(q, raw.get("ts", 0)) for raw in qs
+            if (q := adapt_options(raw, len(raw["options"])))]
+
+_CACHE = QuestionCache(
+    ttl=CACHE_TTL,
+    max_questions=int(os.getenv("CACHE_MAX_QUESTIONS", "5000")),
+    db_path=os.getenv("CACHE_DB", "question_cache.sqlite3") or None,
+    decode=_decode_pool,
+)
+
+POOL_MAX = 200
+
+# Кэш хранит пул вопросов на (нормализованная тема, сложность); игра на count
+# вопросов с любым num_options получает случайную выборку из пула. У каждого
+# вопроса своя метка ts — время генерации его партии: запись в пул продлевает
+# жизнь записи кэша, но старые партии всё равно выходят через CACHE_TTL.
+# В пул кладутся только ответы GigaChat, не банк и не _FALLBACK.
+def _live(pool, now=None):
+    cutoff = (now or time.time()) - CACHE_TTL
+    return [q for q in pool or () if q.get("ts", 0) > cutoff]
+
 def cache_get(key):
-    if key in _CACHE:
-        ts, qs = _CACHE[key]
-        if time.time() - ts < CACHE_TTL:
-            return qs
-        del _CACHE[key]
-    return None
+    topic, count, difficulty, num_options = key
+    pool = _live(_CACHE.get((normalize_topic(topic), difficulty)))
+    if len(pool) < count:
+        return None
+    # Под num_options подгоняются только выдаваемые вопросы, а не весь пул:
+    # ленивый проход по перемешанному пулу до count подошедших.
+    fitted = (q if len(q["options"]) == num_options else adapt_options(q, num_options)
+              for q in random.sample(pool, len(pool)))
+    qs = list(itertools.islice(filter(None, fitted), count))
+    return qs if len(qs) == count else None
 
 def cache_set(key, questions):
-    _CACHE[key] = (time.time(), questions)
+    topic, _, difficulty, _ = key
+    pkey = (normalize_topic(topic), difficulty)
+    now = time.time()
+    pool = _live(_CACHE.get(pkey), now)
+    seen = {q["question"].strip().lower() for q in pool}
+    for q in questions:
+        text = q["question"].strip().lower()
+        if text not in seen:
+            seen.add(text)
+            pool.append(_stamped(q, now))
+    _CACHE.set(pkey, pool[-POOL_MAX:])
 
-@dataclass
+def pool_size(topic, difficulty):
+    return len(_live(_CACHE.peek((normalize_topic(topic), difficulty))))
+
+@dataclass(slots=True)
 class Player:
     sid: str
     name: str
@@ -32,6 +81,8 @@ class Player:
     answer_time: float = 0.0
     streak: int = 0
     total_correct: int = 0
+    seq: int = 0
+    binary: bool = False
 
     def reset_answer(self):
         self.answered = False
@@ -45,7 +96,10 @@ class Player:
             "total_correct": self.total_correct,
         }
 
-@dataclass
+def _rank_key(p):
+    return (-p.score, p.seq, p.sid)
+
+@dataclass(slots=True)
 class Room:
     code: str
     host_sid: str
@@ -57,13 +111,31 @@ class Room:
     q_start_time: float = 0.0
     ffa_first: Optional[str] = None
     turn_team: int = 1
+    streaming: bool = False
+    expected_questions: int = 0
+    phase: str = "lobby"
+    phase_gen: int = 0
+    # Счётчики ведутся на каждом изменении, чтобы submit_answer не обходил всех игроков.
+    team_sizes:    dict = field(default_factory=dict)
+    team_answered: dict = field(default_factory=dict)
+    team_totals:   dict = field(default_factory=lambda: {1: 0, 2: 0})
+    answered_count: int = 0
+    answer_hist:   dict = field(default_factory=dict)
+    answer_buffer: list = field(default_factory=list)
+    board: Leaderboard = field(default_factory=Leaderboard, repr=False)
+    next_seq: int = 0
+    binary_count: int = 0
+    touched: float = field(default_factory=time.monotonic)
 
     @property
     def mode(self):        return self.settings.get("game_mode", "classic")
     @property
     def difficulty(self):  return self.settings.get("difficulty", "medium")
     @property
-    def total_questions(self): return len(self.questions)
+    def total_questions(self):
+        if self.streaming:
+            return max(len(self.questions), self.expected_questions)
+        return len(self.questions)
     @property
     def current_question(self):
         return self.questions[self.current_q] if 0 <= self.current_q < len(self.questions) else None
@@ -71,46 +143,98 @@ class Room:
     def human_players(self):
         return [p for p in self.players.values()]
 
-    def add_player(self, sid, name):
-        p = Player(sid=sid, name=name)
+    def add_player(self, sid, name, binary=False):
+        if sid in self.players:
+            self.remove_player(sid)
+        self.next_seq += 1
+        p = Player(sid=sid, name=name, seq=self.next_seq, binary=binary)
+        self.binary_count += binary
+        self.touched = time.monotonic()
         self.players[sid] = p
+        self.board.add(_rank_key(p))
+        self.team_sizes[None] = self.team_sizes.get(None, 0) + 1
+        _sid_room[sid] = self.code
         return p
 
     def remove_player(self, sid):
-        self.players.pop(sid, None)
+        p = self.players.pop(sid, None)
+        if p:
+            self.touched = time.monotonic()
+            self.board.remove(_rank_key(p))
+            self.team_sizes[p.team] -= 1
+            self.binary_count -= p.binary
+            if p.answered:
+                self.team_answered[p.team] -= 1
+                self.answered_count -= 1
+                self.answer_hist[p.answer_index] -= 1
+            if p.team in self.team_totals:
+                self.team_totals[p.team] -= p.score
+        if _sid_room.get(sid) == self.code:
+            del _sid_room[sid]
+
+    def players_list(self, limit=None):
+        ps = self.players.values() if limit is None else itertools.islice(self.players.values(), limit)
+        return [p.to_dict(is_host=(p.sid == self.host_sid)) for p in ps]
+
+    def ranked(self):
+        return (self.players[key[2]] for key in self.board)
 
-    def players_list(self):
-        return [p.to_dict(is_host=(p.sid == self.host_sid)) for p in self.players.values()]
+    def top_players(self, k):
+        return [self.players[key[2]].to_dict() for key in self.board.top(k)]
 
-    def assign_teams(self):
+    def assign_teams(self, on_assign=None):
+        # on_assign(sid, old, new) — для перевода сокета в канал команды.
         sids = list(self.players.keys())
         random.shuffle(sids)
         for i, sid in enumerate(sids):
-            self.players[sid].team = 1 if i % 2 == 0 else 2
+            p = self.players[sid]
+            old, p.team = p.team, 1 if i % 2 == 0 else 2
+            if on_assign:
+                on_assign(sid, old, p.team)
         self.turn_team = 1
+        self.team_sizes, self.team_answered = {}, {}
+        self.team_totals = {1: 0, 2: 0}
+        for p in self.players.values():
+            self.team_sizes[p.team] = self.team_sizes.get(p.team, 0) + 1
+            if p.answered:
+                self.team_answered[p.team] = self.team_answered.get(p.team, 0) + 1
+            self.team_totals[p.team] += p.score
 
     def team_scores(self):
-        s = {1: 0, 2: 0}
-        for p in self.players.values():
-            if p.team in s:
-                s[p.team] += p.score
-        return s
+        return dict(self.team_totals)
+
+    def record_answer(self, sid, answer_index, answer_time=None):
+        p = self.players.get(sid)
+        if not p or p.answered:
+            return None
+        p.answered = True
+        p.answer_index = answer_index
+        p.answer_time = time.time() if answer_time is None else answer_time
+        self.touched = time.monotonic()
+        self.team_answered[p.team] = self.team_answered.get(p.team, 0) + 1
+        self.answered_count += 1
+        self.answer_hist[answer_index] = self.answer_hist.get(answer_index, 0) + 1
+        return p
 
     def reset_answers(self):
         for p in self.players.values():
             p.reset_answer()
+        self.team_answered = {}
+        self.answered_count = 0
+        self.answer_hist = {}
+        self.answer_buffer = []
         self.ffa_first = None
 
     def all_answered(self):
         if self.mode == "team":
-            active = [p for p in self.players.values() if p.team == self.turn_team]
-            return all(p.answered for p in active) if active else True
-        return all(p.answered for p in self.players.values())
+            return self.team_answered.get(self.turn_team, 0) >= self.team_sizes.get(self.turn_team, 0)
+        return self.answered_count >= len(self.players)
 
     def advance_question(self):
         if self.mode == "team":
             self.turn_team = 2 if self.turn_team == 1 else 1
         self.current_q += 1
+        self.touched = time.monotonic()
         if self.current_q >= self.total_questions:
             self.state = "finished"
             return False
@@ -130,15 +254,22 @@ class Room:
         p.total_correct += 1
         if p.streak >= 3:
             points += min(50, (p.streak - 2) * 10)
+        old = _rank_key(p)
         p.score += points
+        self.board.replace(old, _rank_key(p))
+        if p.team in self.team_totals:
+            self.team_totals[p.team] += points
         return points
 
     def reset_streak(self, sid):
         if p := self.players.get(sid):
             p.streak = 0
 
-    def final_results(self):
-        sorted_p = sorted(self.players.values(), key=lambda p: -p.score)
+    def final_results(self, limit=None):
+        if limit is None:
+            sorted_p = self.ranked()
+        else:
+            sorted_p = [self.players[key[2]] for key in self.board.top(limit)]
         out = {
             "mode": self.mode,
             "players": [
@@ -154,12 +285,41 @@ class Room:
         return out
 
 rooms: dict[str, Room] = {}
+_sid_room: dict[str, str] = {}
 
 def gen_code():
     while True:
         code = "".join(random.choices(string.ascii_uppercase, k=6))
-        if code not in rooms:
+        if code not in rooms and owns(code):
             return code
 
+def team_channel(code, team):
+    return f"{code}/t{team}"
+
 def get_room_by_sid(sid):
-    return next((r for r in rooms.values() if sid in r.players), None)
+    code = _sid_room.get(sid)
+    return rooms.get(code) if code else None
+
+def drop_room(code):
+    room = rooms.pop(code, None)
+    if room:
+        for sid in room.players:
+            if _sid_room.get(sid) == code:
+                del _sid_room[sid]
+    return room
+
+if __name__ == "__main__":
+    # get_room_by_sid через индекс против прежнего обхода всех комнат
+    # (next(r for r in rooms.values() if sid in r.players)) при росте числа комнат.
+    import timeit
+    print(f"{'комнат':>8}{'индекс, мкс':>14}{'обход, мкс':>14}")
+    for n in (10, 100, 1000, 10_000, 50_000):
+        for i in range(len(rooms), n):
+            room = rooms[f"B{i:06d}"] = Room(code=f"B{i:06d}", host_sid=f"s{i}-0")
+            for j in range(4):
+                room.add_player(f"s{i}-{j}", f"p{j}")
+        probe = [f"s{i}-{j}" for i in random.sample(range(n), min(n, 200)) for j in range(4)]
+        t_idx = min(timeit.repeat(lambda: [get_room_by_sid(s) for s in probe], number=20, repeat=5))
+        t_scan = min(timeit.repeat(lambda: [next((r for r in rooms.values() if s in r.players), None)
+                                            for s in probe[:40]], number=1, repeat=3))
+        print(f"{n:>8}{t_idx / 20 / len(probe) * 1e6:>14.3f}{t_scan / 40 * 1e6:>14.1f}")
@@ -0,0 +1,63 @@
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    # Отсортированный список, разбитый на корзины по ≤ LOAD элементов:
+    # вставка/удаление — bisect по максимумам корзин + короткий insort,
+    # top-K — проход по первым корзинам; места всем игрокам — один обход
+    # (Room.ranked). Ключи сравнимы и уникальны, например (-score, seq, sid).
+
+    LOAD = 256
+
+    def __init__(self):
+        self._buckets = []
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for b in self._buckets:
+            yield from b
+
+    def add(self, key):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+        else:
+            i = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+            b = self._buckets[i]
+            insort(b, key)
+            self._maxes[i] = b[-1]
+            if len(b) > 2 * self.LOAD:
+                self._buckets[i:i+1] = [b[:self.LOAD], b[self.LOAD:]]
+                self._maxes[i:i+1] = [b[self.LOAD - 1], b[-1]]
+        self._len += 1
+
+    def remove(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            raise KeyError(key)
+        b = self._buckets[i]
+        j = bisect_left(b, key)
+        if j == len(b) or b[j] != key:
+            raise KeyError(key)
+        del b[j]
+        self._len -= 1
+        if b:
+            self._maxes[i] = b[-1]
+        else:
+            del self._buckets[i], self._maxes[i]
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def top(self, k):
+        out = []
+        for b in self._buckets:
+            if len(out) >= k:
+                break
+            out.extend(b[:k - len(out)])
+        return out
@@ -0,0 +1,143 @@
+import time, logging
+from bisect import bisect_left
+import eventlet
+
+logger = logging.getLogger(__name__)
+
+# Метрики в текстовом формате Prometheus без внешних зависимостей.
+# observe() — bisect по границам корзин и три сложения, поэтому
+# инструментацию можно держать включённой в проде (замер: python -m app.metrics).
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SLOW_BUCKETS    = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+LAG_INTERVAL    = 0.5
+
+
+class Histogram:
+    def __init__(self, name, doc, label=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, value, label=None):
+        s = self._series.get(label)
+        if s is None:
+            s = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        s[0][bisect_left(self.buckets, value)] += 1
+        s[1] += value
+        s[2] += 1
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for label, (counts, total, n) in sorted(self._series.items(), key=lambda kv: str(kv[0])):
+            lbl = f'{self.label}="{label}",' if self.label else ""
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                out.append(f'{self.name}_bucket{{{lbl}le="{bound}"}} {acc}')
+            out.append(f'{self.name}_bucket{{{lbl}le="+Inf"}} {n}')
+            tail = f"{{{lbl[:-1]}}}" if lbl else ""
+            out.append(f"{self.name}_sum{tail} {total:.6f}")
+            out.append(f"{self.name}_count{tail} {n}")
+        return out
+
+
+GENERATION = Histogram("quizbattle_generation_seconds", "Время получения набора вопросов", "backend", SLOW_BUCKETS)
+PARSE      = Histogram("quizbattle_parse_seconds", "Разбор ответа GigaChat (_parse_response)")
+SUBMIT     = Histogram("quizbattle_submit_seconds", "Обработка submit_answer до answer_ack")
+BROADCAST  = Histogram("quizbattle_emit_seconds", "Рассылка события Socket.IO", "event")
+HUB_LAG    = Histogram("quizbattle_hub_lag_seconds", "Опоздание пробуждения в хабе eventlet")
+HISTOGRAMS = (GENERATION, PARSE, SUBMIT, BROADCAST, HUB_LAG)
+
+
+def emit(event, *args, **kwargs):
+    from . import socketio
+    t0 = time.perf_counter()
+    socketio.emit(event, *args, **kwargs)
+    BROADCAST.observe(time.perf_counter() - t0, event)
+
+
+def _lag_probe():
+    while True:
+        t0 = time.monotonic()
+        eventlet.sleep(LAG_INTERVAL)
+        HUB_LAG.observe(max(0.0, time.monotonic() - t0 - LAG_INTERVAL))
+
+
+_probe = None
+
+def start():
+    global _probe
+    if _probe is None:
+        _probe = eventlet.spawn(_lag_probe)
+
+
+def _gauge(name, doc, samples, kind="gauge"):
+    out = [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        out.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return out
+
+
+def render() -> str:
+    from .game_logic import rooms, _CACHE
+    from .scheduler import scheduler
+    from .reaper import reap_stats
+    from .warmer import warm_stats
+    from .socket_events import flight_stats, flight_top
+    from . import ai_client
+
+    by_state, players = {}, {}
+    for room in rooms.values():
+        by_state[room.state] = by_state.get(room.state, 0) + 1
+        players[room.state] = players.get(room.state, 0) + len(room.players)
+
+    lines = []
+    for h in HISTOGRAMS:
+        lines += h.render()
+    lines += _gauge("quizbattle_rooms", "Комнаты по состоянию",
+                    [(f'state="{s}"', n) for s, n in sorted(by_state.items())])
+    lines += _gauge("quizbattle_players", "Игроки по состоянию комнаты",
+                    [(f'state="{s}"', n) for s, n in sorted(players.items())])
+    lines += _gauge("quizbattle_generation_active", "Идущие генерации", [("", ai_client._gen_active)])
+    lines += _gauge("quizbattle_generation_queued", "Ожидающие в очереди генерации", [("", len(ai_client._gen_queue))])
+    lines += _gauge("quizbattle_gigachat_circuit_open", "Circuit breaker GigaChat разомкнут",
+                    [("", int(ai_client._breaker.state != "closed"))])
+    lines += _gauge("quizbattle_timers", "Таймеры в планировщике", [("", scheduler.pending())])
+    lines += _gauge("quizbattle_timer_max_lag_seconds", "Максимальное опоздание таймера",
+                    [("", round(scheduler.max_lag, 6))])
+    lines += _gauge("quizbattle_cache_total", "Счётчики кэша вопросов",
+                    [(f'result="{k}"', v) for k, v in _CACHE.stats.items()], "counter")
+    lines += _gauge("quizbattle_reaped_total", "Закрытые уборщиком комнаты",
+                    [(f'reason="{k}"', reap_stats[k]) for k in ("idle", "budget")], "counter")
+    lines += _gauge("quizbattle_generation_flights_total", "Генерации и запросы, дождавшиеся уже идущей",
+                    [(f'result="{k}"', v) for k, v in flight_stats.items()], "counter")
+    lines += _gauge("quizbattle_generation_flights_by_key_total", "То же для самых частых ключей генерации",
+                    [(f'topic="{t}",count="{c}",difficulty="{d}",options="{o}",result="{r}"', n)
+                     for (t, c, d, o), v in flight_top() for r, n in v.items()], "counter")
+    lines += _gauge("quizbattle_warmer_total", "Счётчики прогрева популярных тем",
+                    [(f'event="{k}"', v) for k, v in warm_stats.items()], "counter")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    # Замер стоимости инструментации: observe() против пустого цикла.
+    n = 1_000_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        time.perf_counter()
+    base = time.perf_counter() - t0
+    h = Histogram("bench", "bench", "event")
+    t0 = time.perf_counter()
+    for i in range(n):
+        h.observe(time.perf_counter() - t0, "new_question")
+    cost = time.perf_counter() - t0 - base
+    print(f"observe(): {cost / n * 1e9:.0f} нс на вызов ({n} вызовов)")
+    for i in range(50):
+        h.observe(0.001, f"event{i}")
+    t0 = time.perf_counter()
+    for _ in range(100):
+        h.render()
+    print(f"render(): {(time.perf_counter() - t0) * 10:.2f} мс на 50 рядов")
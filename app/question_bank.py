@@ -0,0 +1,143 @@
+import os, json, time, random, logging
+from collections import defaultdict
+from .topics import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# Слова темы, которые ничего не говорят о предмете вопроса.
+_STOP = {"общ", "знан", "вопрос", "тем", "разн", "все", "про", "для", "как", "что", "кто", "это"}
+# Сколько слов темы игры должно найтись в теме/тегах вопроса (или все, если их меньше).
+MIN_MATCH = int(os.getenv("QUESTION_BANK_MIN_MATCH", "2"))
+
+
+def _words(text):
+    return {w for w in normalize_topic(text).split() if len(w) >= 3 and w not in _STOP}
+
+
+class QuestionBank:
+    # Банк вопросов из JSON Lines: по строке на вопрос
+    #   {"topic": "...", "tags": [...], "difficulty": "easy|medium|hard",
+    #    "question": "...", "options": [...], "correct": 0}
+    # Два обратных индекса: основа слова темы/тегов → [номер] и основа слова
+    # текста вопроса → [номер]. Релевантность (covers, strict) — только по
+    # теме и тегам: вопрос подходит, если совпало min(MIN_MATCH, n) из n слов
+    # темы игры, и сложность та же. Слова текста лишь упорядочивают добор.
+    # Файл перечитывается, если сменился mtime (не чаще раза в reload_check с).
+
+    def __init__(self, path, validate=None, reload_check=5.0):
+        self.path = path
+        self.validate = validate
+        self.reload_check = reload_check
+        self._mtime = None
+        self._checked = 0.0
+        self._items = []
+        self._diff = []
+        self._index = {}
+        self._text = {}
+        self._by_diff = {}
+
+    def _load(self):
+        items, diffs, seen = [], [], set()
+        index, text_index, by_diff = defaultdict(list), defaultdict(list), defaultdict(list)
+        with open(self.path, encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    raw = json.loads(line)
+                    opts = raw["options"]
+                    topic, tags, diff = raw.get("topic", ""), raw.get("tags", []), raw.get("difficulty", "medium")
+                    if not (isinstance(topic, str) and isinstance(diff, str) and isinstance(tags, list)
+                            and all(isinstance(t, str) for t in tags)):
+                        raise TypeError("topic и difficulty — строки, tags — список строк")
+                    q = self.validate(raw, len(opts)) if self.validate else raw
+                except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                    logger.warning("⚠️ Банк вопросов: строка %d пропущена: %s", n, exc)
+                    continue
+                if q is None:
+                    continue
+                text = " ".join(q["question"].lower().split())
+                if text in seen:
+                    continue
+                seen.add(text)
+                i = len(items)
+                items.append(q)
+                diffs.append(diff)
+                by_diff[diff].append(i)
+                for w in _words(" ".join([topic] + tags)):
+                    index[w].append(i)
+                for w in _words(q["question"]):
+                    text_index[w].append(i)
+        self._items, self._diff = items, diffs
+        self._index, self._text, self._by_diff = dict(index), dict(text_index), dict(by_diff)
+        logger.info("📚 Банк вопросов: %d вопросов, %d ключевых слов", len(items), len(index))
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < self.reload_check and self._mtime is not None:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            if self._mtime is not None:
+                logger.warning("⚠️ Банк вопросов %s пропал — оставляю загруженный", self.path)
+            self._mtime = 0
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                self._load()
+            except (OSError, ValueError) as exc:
+                logger.warning("⚠️ Банк вопросов %s не прочитан: %s", self.path, exc)
+
+    def _matches(self, words, index):
+        hits = defaultdict(int)
+        for w in words:
+            for i in index.get(w, ()):
+                hits[i] += 1
+        return hits
+
+    def relevant(self, topic, difficulty=None):
+        # {номер: сколько слов темы совпало} — только подходящие вопросы.
+        self._maybe_reload()
+        words = _words(topic)
+        need = min(MIN_MATCH, len(words))
+        return {i: n for i, n in self._matches(words, self._index).items()
+                if n >= need and (difficulty is None or self._diff[i] == difficulty)}
+
+    def covers(self, topic, count, difficulty="medium"):
+        return len(self.relevant(topic, difficulty)) >= count
+
+    def sample(self, topic, count, difficulty="medium", strict=False):
+        # strict: только релевантные вопросы нужной сложности, иначе None.
+        # Без strict: релевантные (своя сложность выше), затем совпавшие
+        # по тексту вопроса, затем добор из остального банка. Без повторов.
+        hits = self.relevant(topic)
+        own = [i for i in hits if self._diff[i] == difficulty]
+        if strict:
+            return [self._items[i] for i in random.sample(own, count)] if len(own) >= count else None
+        relevant = list(hits)
+        random.shuffle(relevant)
+        relevant.sort(key=lambda i: (self._diff[i] != difficulty, -hits[i]))
+        picked = relevant[:count]
+        if len(picked) < count:
+            taken = set(picked)
+            loose = [i for i in self._matches(_words(topic), self._text) if i not in taken]
+            random.shuffle(loose)
+            loose.sort(key=lambda i: self._diff[i] != difficulty)
+            picked += loose[:count - len(picked)]
+        if len(picked) < count:
+            for pool in (self._by_diff.get(difficulty, []), range(len(self._items))):
+                need = count - len(picked)
+                taken = set(picked)
+                rest = [i for i in pool if i not in taken]
+                picked += random.sample(rest, min(need, len(rest)))
+                if len(picked) >= count:
+                    break
+        random.shuffle(picked)
+        return [self._items[i] for i in picked]
+
+    def __len__(self):
+        self._maybe_reload()
+        return len(self._items)
@@ -0,0 +1,74 @@
+import os, time, logging
+from . import socketio
+from .game_logic import rooms, drop_room, team_channel, _CACHE
+from .scheduler import scheduler
+from .wire import subroom
+
+logger = logging.getLogger(__name__)
+
+# Комната удаляется не только когда уходит последний игрок: зависшие лобби,
+# доигранные партии и брошенные игры чистит периодический проход по TTL
+# простоя (по room.state), а сверх бюджета — самые давно активные.
+REAP_INTERVAL = float(os.getenv("REAP_INTERVAL", "30"))
+ROOM_TTL = {
+    "waiting":  float(os.getenv("ROOM_TTL_WAITING",  "1800")),
+    "playing":  float(os.getenv("ROOM_TTL_PLAYING",  "600")),
+    "finished": float(os.getenv("ROOM_TTL_FINISHED", "300")),
+}
+ROOMS_MAX   = int(os.getenv("ROOMS_MAX",   "5000"))
+PLAYERS_MAX = int(os.getenv("PLAYERS_MAX", "100000"))
+
+REASONS = {
+    "idle":   "Комната закрыта из-за неактивности.",
+    "budget": "Комната закрыта: сервер перегружен.",
+}
+
+reap_stats = {"runs": 0, "idle": 0, "budget": 0, "players": 0, "cache_expired": 0, "last_ms": 0.0}
+
+
+def evict(code, reason):
+    room = drop_room(code)
+    if not room:
+        return
+    scheduler.cancel_prefix(code)
+    socketio.emit("room_closed", {"reason": reason, "message": REASONS[reason]}, room=code)
+    for sid, p in room.players.items():
+        socketio.server.leave_room(sid, code, namespace="/")
+        socketio.server.leave_room(sid, subroom(code, p.binary), namespace="/")
+        if p.team:
+            socketio.server.leave_room(sid, team_channel(code, p.team), namespace="/")
+    reap_stats[reason] += 1
+    reap_stats["players"] += len(room.players)
+    logger.info("🧹 Комната %s закрыта (%s), игроков: %d", code, reason, len(room.players))
+
+
+def reap():
+    t0 = time.monotonic()
+    for code, room in list(rooms.items()):
+        ttl = ROOM_TTL.get(room.state)
+        if ttl is not None and t0 - room.touched > ttl:
+            evict(code, "idle")
+
+    players = sum(len(r.players) for r in rooms.values())
+    if len(rooms) > ROOMS_MAX or players > PLAYERS_MAX:
+        for room in sorted(rooms.values(), key=lambda r: r.touched):
+            if len(rooms) <= ROOMS_MAX and players <= PLAYERS_MAX:
+                break
+            players -= len(room.players)
+            evict(room.code, "budget")
+
+    reap_stats["cache_expired"] += _CACHE.purge_expired()
+    reap_stats["runs"] += 1
+    reap_stats["last_ms"] = round((time.monotonic() - t0) * 1000, 2)
+
+
+def _tick():
+    try:
+        reap()
+    finally:
+        scheduler.schedule(("reaper",), REAP_INTERVAL, _tick)
+
+
+def start():
+    if scheduler.time_left(("reaper",)) is None:
+        scheduler.schedule(("reaper",), REAP_INTERVAL, _tick)
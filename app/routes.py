@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 import time
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, Response, render_template, jsonify
+from .game_logic import rooms
+from .reaper import reap_stats
+from .socket_events import flight_stats, flight_top
+from . import metrics
 
 bp = Blueprint("main", __name__)
 
@@ -12,4 +16,12 @@ def index():
 
 @bp.route("/health")
 def health():
-    return jsonify({"status": "ok", "ts": time.time()})
+    return jsonify({"status": "ok", "ts": time.time(), "rooms": len(rooms), "reaper": reap_stats,
+                    "generation": {**flight_stats, "top": [
+                        {"topic": k[0], "count": k[1], "difficulty": k[2], "num_options": k[3], **v}
+                        for k, v in flight_top()]}})
+
+
+@bp.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,219 @@
+import time, heapq, itertools, logging
+import eventlet
+from eventlet.queue import LightQueue, Empty
+
+logger = logging.getLogger(__name__)
+
+
+class _Timer:
+    __slots__ = ("key", "due", "fn", "args", "remaining", "active")
+
+    def __init__(self, key, due, fn, args):
+        self.key = key
+        self.due = due
+        self.fn = fn
+        self.args = args
+        self.remaining = None
+        self.active = True
+
+
+class Scheduler:
+    # Все дедлайны комнат в одной куче и одном гринлете вместо спящего
+    # spawn_after на каждый вопрос. Таймеры адресуются ключом (обычно
+    # (код комнаты, назначение)); новый schedule с тем же ключом заменяет старый.
+
+    def __init__(self):
+        self._heap = []
+        self._timers = {}
+        self._seq = itertools.count()
+        self._stale = 0
+        self._wake = LightQueue()
+        self._runner = None
+        self.fired = 0
+        self.max_lag = 0.0
+
+    def schedule(self, key, delay, fn, *args):
+        self.cancel(key)
+        t = _Timer(key, time.monotonic() + delay, fn, args)
+        self._timers[key] = t
+        self._push(t)
+        return t
+
+    def cancel(self, key):
+        t = self._timers.pop(key, None)
+        if t:
+            if t.active and t.remaining is None:
+                self._stale += 1
+            t.active = False
+        return t is not None
+
+    def cancel_prefix(self, prefix):
+        for key in [k for k in self._timers if isinstance(k, tuple) and k[0] == prefix]:
+            self.cancel(key)
+
+    def extend(self, key, seconds):
+        t = self._timers.get(key)
+        if not t or not t.active:
+            return False
+        if t.remaining is not None:
+            t.remaining += seconds
+        else:
+            self._stale += 1
+            t.due += seconds
+            self._push(t)
+        return True
+
+    def pause(self, key):
+        t = self._timers.get(key)
+        if not t or not t.active or t.remaining is not None:
+            return False
+        t.remaining = max(0.0, t.due - time.monotonic())
+        self._stale += 1
+        return True
+
+    def resume(self, key):
+        t = self._timers.get(key)
+        if not t or t.remaining is None:
+            return False
+        t.due, t.remaining = time.monotonic() + t.remaining, None
+        self._push(t)
+        return True
+
+    def time_left(self, key):
+        t = self._timers.get(key)
+        if not t:
+            return None
+        return t.remaining if t.remaining is not None else max(0.0, t.due - time.monotonic())
+
+    def pending(self):
+        return len(self._timers)
+
+    def _push(self, t):
+        heapq.heappush(self._heap, (t.due, next(self._seq), t))
+        if self._stale > 1024 and self._stale > len(self._timers):
+            self._compact()
+        if self._runner is None:
+            self._runner = eventlet.spawn(self._run)
+        elif self._heap[0][2] is t:
+            self._wake.put(None)
+
+    def _compact(self):
+        self._heap = [(t.due, next(self._seq), t) for t in self._timers.values() if t.active and t.remaining is None]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _run(self):
+        while True:
+            delay = None
+            while self._heap:
+                due, _, t = self._heap[0]
+                if not t.active or t.remaining is not None or t.due != due:
+                    heapq.heappop(self._heap)
+                    self._stale = max(0, self._stale - 1)
+                    continue
+                now = time.monotonic()
+                if due > now:
+                    delay = due - now
+                    break
+                # Ключ остаётся за таймером до вызова: schedule/cancel,
+                # успевшие до _fire, его ещё отменяют.
+                heapq.heappop(self._heap)
+                t.active = False
+                self.max_lag = max(self.max_lag, now - due)
+                eventlet.spawn_n(self._fire, t)
+            try:
+                self._wake.get(timeout=delay)
+            except Empty:
+                pass
+
+    def _fire(self, t):
+        if self._timers.get(t.key) is not t:
+            return
+        del self._timers[t.key]
+        self.fired += 1
+        try:
+            t.fn(*t.args)
+        except Exception:
+            logger.exception("Ошибка в таймере %r", t.key)
+
+
+scheduler = Scheduler()
+
+
+if __name__ == "__main__":
+    # Нагрузка как у 10 000 комнат: у каждой фазовый таймер, который при
+    # срабатывании заводится заново (вопрос → раскрытие → вопрос), а часть
+    # таймеров заменяется досрочно, как при ответе всех игроков. Память на
+    # таймер и опоздание срабатываний — против отдельного spawn_after на таймер.
+    import sys, random, tracemalloc
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    class SpawnAfter:
+        # Как было до Scheduler: spawn_after на каждый таймер без отмены,
+        # устаревшее срабатывание отсекает проверка поколения при вызове.
+        def __init__(self):
+            self._gen = {}
+
+        def schedule(self, key, delay, fn, *args):
+            gen = self._gen[key] = self._gen.get(key, 0) + 1
+            eventlet.spawn_after(delay, self._fire, key, gen, fn, args)
+
+        def _fire(self, key, gen, fn, args):
+            if self._gen.get(key) == gen:
+                fn(*args)
+
+        def cancel(self, key):
+            self._gen.pop(key, None)
+
+    def memory(make):
+        s = make()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(n):
+            s.schedule((f"R{i:05d}", "phase"), 3600, print)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        for i in range(n):
+            s.cancel((f"R{i:05d}", "phase"))
+        return used / n
+
+    def jitter(make):
+        s, rng, lags = make(), random.Random(0), []
+
+        def arm(i):
+            delay = rng.uniform(0.2, 1.5)
+            s.schedule((f"R{i:05d}", "phase"), delay, fire, i, time.monotonic() + delay)
+
+        def fire(i, due):
+            lags.append(time.monotonic() - due)
+            arm(i)
+
+        for i in range(n):
+            arm(i)
+        # Досрочные замены — по полраза в секунду на комнату, по часам, а не
+        # по тикам цикла: иначе медленный хаб получил бы нагрузку легче.
+        cpu, last = time.process_time(), time.monotonic()
+        end, owed = last + seconds, 0.0
+        while time.monotonic() < end:
+            eventlet.sleep(0.01)
+            now = time.monotonic()
+            owed += (now - last) * n / 2
+            last = now
+            for i in rng.sample(range(n), min(n, int(owed))):
+                arm(i)
+            owed -= int(owed)
+        cpu = time.process_time() - cpu
+        for i in range(n):
+            s.cancel((f"R{i:05d}", "phase"))
+        lags.sort()
+        pick = lambda q: lags[min(len(lags) - 1, int(len(lags) * q))] * 1000
+        return len(lags), pick(.5), pick(.99), lags[-1] * 1000, cpu / seconds
+
+    print(f"{n} комнат, {seconds:.0f} с нагрузки")
+    for name, make in (("Scheduler", Scheduler), ("spawn_after", SpawnAfter)):
+        per_timer = memory(make)
+        fired, p50, p99, worst, cpu = jitter(make)
+        print(f"  {name:<12} {per_timer:6.0f} Б на таймер, {fired} срабатываний, опоздание "
+              f"p50 {p50:.1f} мс, p99 {p99:.1f} мс, max {worst:.1f} мс, CPU {cpu:.0%}")
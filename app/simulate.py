@@ -0,0 +1,288 @@
+import time, random, timeit
+from .game_logic import Room, _sid_room, MAX_TIME
+from .ai_client import _fix_indexing, _fix_and_validate
+
+# Игра целиком без сокетов и таймеров: те же методы Room, что дёргает
+# socket_events, но с виртуальными часами и random.Random(seed), поэтому
+# один и тот же seed даёт один и тот же итог. python -m app.simulate —
+# прогон режимов, замер горячих путей и рассылки по каналам команд.
+
+
+def make_questions(count, num_options, rng):
+    raw = []
+    base = rng.choice((0, 1))      # иногда «модель» нумерует с единицы
+    for i in range(count):
+        raw.append({
+            "question": f"Сколько будет {i + 1} + {i + 1}?",
+            "options":  [f"Ответ {i + 1}.{j + 1}" for j in range(num_options)],
+            "correct":  rng.randrange(num_options) + base,
+        })
+    raw = _fix_indexing(raw, num_options)
+    return [q for q in (_fix_and_validate(r, num_options) for r in raw) if q]
+
+
+def play_game(mode="classic", players=8, questions=10, num_options=4,
+              difficulty="medium", accuracy=0.6, seed=0):
+    rng = random.Random(seed)
+    random.seed(seed)              # assign_teams и adapt_options берут модульный random
+    room = Room(code=f"SIM{seed}", host_sid="p0",
+                settings={"game_mode": mode, "difficulty": difficulty, "num_options": num_options})
+    clock = 1000.0
+    try:
+        for i in range(players):
+            room.add_player(f"p{i}", f"Игрок {i}")
+        room.questions = make_questions(questions, num_options, rng)
+        if mode == "team":
+            room.assign_teams()
+        room.state, room.phase = "playing", "question"
+        room.reset_answers()
+        room.q_start_time = clock
+
+        while True:
+            q = room.current_question
+            answers = []
+            for p in room.players.values():
+                if mode == "team" and p.team != room.turn_team:
+                    continue
+                ok = rng.random() < accuracy
+                ans = q["correct"] if ok else rng.choice([i for i in range(num_options) if i != q["correct"]])
+                answers.append((clock + rng.uniform(0.5, MAX_TIME - 1), p.sid, ans))
+            answers.sort()
+
+            for t, sid, ans in answers:
+                room.record_answer(sid, ans, t)
+                if ans == q["correct"]:
+                    room.award_point(sid)
+                    if mode == "ffa" and room.ffa_first is None:
+                        room.ffa_first = sid
+                        break
+                else:
+                    room.reset_streak(sid)
+
+            clock += MAX_TIME
+            if not room.advance_question():
+                break
+            room.q_start_time = clock
+        return room.final_results()
+    finally:
+        release(room)
+
+
+def _bench(label, fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:24} {best * 1e9:10.0f} нс/оп")
+
+
+def hot_paths(players=200):
+    # Горячие пути на комнате из players игроков: (комната, [(название,
+    # функция, повторов)]). Общие для benchmark() и tests/test_benchmarks.py;
+    # sid игроков потом убирает release(room).
+    rng = random.Random(0)
+    room = Room(code="BENCH", host_sid="p0", settings={"difficulty": "hard"})
+    for i in range(players):
+        room.add_player(f"p{i}", f"Игрок {i}")
+    room.questions = make_questions(50, 4, rng)
+    room.q_start_time = time.time()
+    sids = list(room.players)
+    for sid in sids:
+        room.players[sid].answer_time = room.q_start_time + rng.uniform(0, MAX_TIME)
+    it = iter(range(10 ** 9))
+
+    def award():
+        room.award_point(sids[next(it) % players])
+
+    def advance():
+        room.current_q = 0
+        room.advance_question()
+
+    raw = [{"question": f"Q{i}?", "options": ["a", "b", "c", "d"], "correct": i % 4} for i in range(20)]
+    one = {"question": "Столица Франции?", "options": ["Париж", "Лондон", "Берлин", "Рим", "Мадрид"], "correct": 2}
+    return room, [
+        ("award_point", award, 20_000),
+        ("advance_question", advance, 2_000),
+        ("final_results", room.final_results, 200),
+        ("_fix_indexing (20 шт.)", lambda: _fix_indexing(raw, 4), 20_000),
+        ("_fix_and_validate", lambda: _fix_and_validate(one, 4), 20_000),
+    ]
+
+
+def release(room):
+    for sid in room.players:
+        if _sid_room.get(sid) == room.code:
+            del _sid_room[sid]
+
+
+def benchmark(players=200):
+    room, paths = hot_paths(players)
+    print(f"Горячие пути ({players} игроков):")
+    for label, fn, number in paths:
+        _bench(label, fn, number)
+    release(room)
+
+
+def team_fanout(players=2000):
+    # game_started в командной игре: emit каждому игроку против рассылки в
+    # два канала команд. Сервер python-socketio настоящий, отправка в
+    # engine.io заменена счётчиком — замеряется кодирование и обход комнат.
+    # (комната, emit каждому, по каналам, счётчик пакетов [n]).
+    import socketio
+    from .game_logic import team_channel
+    srv = socketio.Server(async_mode="threading")
+    sent = [0]
+    srv._send_eio_packet = lambda eio_sid, pkt: sent.__setitem__(0, sent[0] + 1)
+    room = Room(code="FAN", host_sid="e0", settings={"game_mode": "team"})
+    sid_of = {}
+    for i in range(players):
+        sid_of[f"e{i}"] = srv.manager.connect(f"e{i}", "/")
+        room.add_player(f"e{i}", f"Игрок {i}")
+    room.assign_teams(lambda sid, old, new: srv.enter_room(sid_of[sid], team_channel("FAN", new)))
+
+    def unicast():
+        for p in room.players.values():
+            srv.emit("game_started", {"your_team": p.team, "mode": "team"}, room=sid_of[p.sid])
+
+    def per_team():
+        for team in (1, 2):
+            srv.emit("game_started", {"your_team": team, "mode": "team"}, room=team_channel("FAN", team))
+
+    return room, unicast, per_team, sent
+
+
+def fanout(players=2000, rounds=20):
+    room, unicast, per_team, sent = team_fanout(players)
+    print(f"Рассылка game_started ({players} игроков, 2 команды):")
+    for label, fn in (("emit каждому", unicast), ("канал команды", per_team)):
+        sent[0] = 0
+        best = min(timeit.repeat(fn, number=rounds, repeat=3)) / rounds
+        print(f"  {label:16} {best * 1000:8.2f} мс, пакетов {sent[0] // (rounds * 3)}")
+    release(room)
+
+
+def audience(players=10_000, questions=3):
+    # Вопрос на players игроков в режиме audience против classic: пакеты и
+    # байты, ушедшие клиентам, и CPU сервера от new_question до итогов.
+    # Работают настоящие обработчики socket_events; отправка в engine.io
+    # заменена счётчиком. Ответы приходят 40 пачками, в audience после
+    # каждой — тик _audience_tick, как раз в AUDIENCE_TICK.
+    from . import create_app, socketio
+    from . import socket_events as se
+    from .game_logic import rooms, drop_room
+    from .scheduler import scheduler
+
+    create_app()
+    srv = socketio.server
+    sent = [0, 0]
+
+    def count(eio_sid, pkt):
+        sent[0] += 1
+        sent[1] += len(pkt.data) if isinstance(pkt.data, (str, bytes)) else 0
+    srv._send_eio_packet = count
+
+    rng = random.Random(0)
+    print(f"Вопрос на {players} игроков (среднее по {questions} вопросам):")
+    for mode in ("audience", "classic"):
+        sids = [srv.manager.connect(f"{mode}{i}", "/") for i in range(players)]
+        room = Room(code=f"AUD{mode[0].upper()}", host_sid=sids[0], settings={"game_mode": mode})
+        rooms[room.code] = room
+        for i, sid in enumerate(sids):
+            se._enter(sid, room, room.add_player(sid, f"Игрок {i}"))
+        room.questions = make_questions(questions + 1, 4, rng)
+        se._begin_game(room)
+        pkts = size = cpu = 0.0
+        for qn in range(questions + 1):
+            if qn:
+                sent[:] = [0, 0]
+                c0 = time.process_time()
+                se._after_reveal(room.code, room.phase_gen, True)
+            q, order = room.current_question, rng.sample(sids, len(sids))
+            step = len(order) // 40 + 1
+            for k in range(0, len(order), step):
+                for sid in order[k:k + step]:
+                    ans = q["correct"] if rng.random() < .6 else rng.randrange(4)
+                    se._handle_submit_answer(sid, {"answer_index": ans})
+                if mode == "audience":
+                    se._audience_tick(room.code, room.phase_gen)
+            assert room.phase == "reveal"
+            if qn:
+                cpu += time.process_time() - c0
+                pkts, size = pkts + sent[0], size + sent[1]
+        print(f"  {mode:9} {pkts / questions:9.0f} пакетов, {size / questions / 2**20:9.1f} МБ "
+              f"({size / questions / players:6.0f} Б на игрока), CPU {cpu / questions * 1000:7.0f} мс")
+        drop_room(room.code)
+        scheduler.cancel_prefix(room.code)
+        for sid in sids:
+            srv.manager.disconnect(sid, "/")
+
+
+def memory(players=100_000, room_size=10):
+    # Память по tracemalloc на players игроков в комнатах по room_size:
+    # соединение Socket.IO, игрок в лобби (Player, индекс sid, рейтинг,
+    # каналы) и комната в игре — вопросы из кэша, таймер, ответ каждого.
+    import tracemalloc
+    from . import create_app, socketio
+    from . import socket_events as se
+    from .game_logic import rooms, drop_room, cache_set, cache_get
+    from .scheduler import scheduler
+
+    create_app()
+    srv = socketio.server
+    srv._send_eio_packet = lambda eio_sid, pkt: None
+    rng = random.Random(0)
+    key = ("История", 10, "medium", 4)
+    cache_set(key, make_questions(50, 4, rng))
+
+    tracemalloc.start()
+    used = lambda: tracemalloc.get_traced_memory()[0]
+    m0 = used()
+    sids = [srv.manager.connect(f"m{i}", "/") for i in range(players)]
+    m1 = used()
+    codes = []
+    for k in range(0, players, room_size):
+        room = Room(code=f"M{k:07d}", host_sid=sids[k])
+        rooms[room.code] = room
+        codes.append(room.code)
+        for i, sid in enumerate(sids[k:k + room_size]):
+            se._enter(sid, room, room.add_player(sid, f"Игрок {i}"))
+    m2 = used()
+    for code in codes:
+        room = rooms[code]
+        room.questions = cache_get(key)
+        se._begin_game(room)
+        for sid in room.players:
+            se._handle_submit_answer(sid, {"answer_index": rng.randrange(4)})
+    m3 = used()
+    # Для сравнения: своя копия набора вопросов в каждой комнате (на всех
+    # комнатах сразу — одиночную копию скрыли бы free list'ы словарей).
+    copies = [[{**q, "options": list(q["options"])} for q in rooms[code].questions] for code in codes]
+    m_copy = (used() - m3) / len(codes)
+    tracemalloc.stop()
+    del copies
+
+    n_rooms = len(codes)
+    print(f"{players} игроков, {n_rooms} комнат по {room_size}:")
+    print(f"  соединение Socket.IO {(m1 - m0) / players:8.0f} Б на игрока")
+    print(f"  игрок в лобби        {(m2 - m1) / players:8.0f} Б на игрока")
+    print(f"  комната в игре       {(m3 - m2) / n_rooms:8.0f} Б на комнату сверх лобби "
+          f"(своя копия вопросов стоила бы ещё {m_copy:.0f} Б)")
+    for code in codes:
+        drop_room(code)
+        scheduler.cancel_prefix(code)
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["audience"]:
+        audience(*map(int, sys.argv[2:]))
+        sys.exit()
+    if sys.argv[1:2] == ["memory"]:
+        memory(*map(int, sys.argv[2:]))
+        sys.exit()
+    for mode in ("classic", "ffa", "team", "audience"):
+        t0 = time.perf_counter()
+        n = 200
+        results = [play_game(mode, players=10, questions=20, seed=s) for s in range(n)]
+        dt = (time.perf_counter() - t0) / n
+        same = play_game(mode, players=10, questions=20, seed=7) == results[7]
+        print(f"{mode:9} {dt * 1000:6.2f} мс/игра (10 игроков, 20 вопросов), детерминизм: {'ok' if same else 'НЕТ'}")
+    benchmark()
+    fanout()
@@ -1,18 +1,33 @@
-import time, logging, eventlet
+import os, time, logging, eventlet
+from eventlet.event import Event
 from flask import request
-from flask_socketio import emit, join_room, leave_room
 from . import socketio
-from .game_logic import rooms, Room, gen_code, get_room_by_sid, cache_get, cache_set
-from .ai_client import generate_questions
+from .backend import handler, route
+from .game_logic import (rooms, Room, gen_code, get_room_by_sid, drop_room, team_channel,
+                         cache_get, cache_set, pool_size, normalize_topic)
+from .scheduler import scheduler
+from .metrics import emit, GENERATION, SUBMIT
+from . import warmer, wire
+from .ai_client import (generate_questions_pooled, stream_questions, GenerationQueueFull, GEN_STREAMING,
+                        bank_questions, bank_covers, fallback_questions, BANK_FIRST)
 
 logger = logging.getLogger(__name__)
-TIME_PER_Q = 30
+TIME_PER_Q   = 30
+REVEAL_TIME  = 3
+INTERIM_TIME = 5
+STREAM_POLL  = 0.2
+
+AUDIENCE_TICK  = 0.25
+AUDIENCE_TOP_K = 10
+LOBBY_LIST_MAX = 50
 
 
 def _emit_question(room: Room):
     q = room.current_question
     if not q:
         return
+    room.phase = "question"
+    room.phase_gen += 1
     payload = {
         "question":        {"question": q["question"], "options": q["options"]},
         "question_number": room.current_q + 1,
@@ -23,135 +38,476 @@ def _emit_question(room: Room):
     if room.mode == "team":
         payload["turn_team"]   = room.turn_team
         payload["team_scores"] = room.team_scores()
-    socketio.emit("new_question", payload, room=room.code)
-    eventlet.spawn_after(TIME_PER_Q + 1, _timeout_question, room.code, room.current_q)
+    _broadcast(room, "new_question", payload)
+    scheduler.schedule((room.code, "phase"), TIME_PER_Q + 1, _timeout_question, room.code, room.phase_gen)
 
 
-def _timeout_question(code, q_idx):
+def _in_phase(code, gen, *phases):
     room = rooms.get(code)
-    if not room or room.state != "playing" or room.current_q != q_idx:
+    if room and room.phase_gen == gen and room.phase in phases:
+        return room
+    return None
+
+
+def _timeout_question(code, gen):
+    room = _in_phase(code, gen, "question")
+    if not room:
         return
+    _flush_answers(room)
+    now = time.time()
     for p in room.players.values():
         if not p.answered:
-            p.answered = True
-            p.answer_index = -1
-            p.answer_time = time.time()
+            room.record_answer(p.sid, -1, now)
             room.reset_streak(p.sid)
     _resolve_question(room)
 
 
+# Фазы вопроса: question → reveal → (interim) → question ... → over.
+# Переходы идут через scheduler с номером поколения phase_gen, поэтому
+# повторный _resolve_question (FFA, таймаут, уход игрока) ничего не делает,
+# а устаревший таймер просто игнорируется.
 def _resolve_question(room: Room):
     q = room.current_question
-    if not q:
+    if not q or room.state != "playing" or room.phase != "question":
         return
+    room.phase = "reveal"
     ci = q["correct"]
     correct_text = q["options"][ci] if 0 <= ci < len(q["options"]) else "?"
 
+    if room.mode == "audience":
+        scheduler.cancel((room.code, "audience"))
+        _reveal_audience(room, ci, correct_text)
+        has_next = room.advance_question()
+        scheduler.schedule((room.code, "phase"), REVEAL_TIME, _after_reveal, room.code, room.phase_gen, has_next)
+        return
+
     player_answers = {
         sid: {"answer": p.answer_index, "correct": (p.answer_index == ci), "streak": p.streak}
         for sid, p in room.players.items()
     }
-    socketio.emit("question_result", {
+    _broadcast(room, "question_result", {
         "correct_index":  ci,
         "correct_answer": correct_text,
         "player_answers": player_answers,
         "scores":         {sid: p.score for sid, p in room.players.items()},
         "team_scores":    room.team_scores() if room.mode == "team" else None,
         "mode":           room.mode,
-    }, room=room.code)
+    })
 
     has_next = room.advance_question()
-    eventlet.sleep(3)
-
-    if has_next:
-        if room.current_q % 5 == 0 and room.current_q < room.total_questions:
-            socketio.emit("interim_results", {
-                "players":       [p.to_dict() for p in room.players.values()],
-                "next_question": room.current_q + 1,
-            }, room=room.code)
-            eventlet.sleep(5)
+    scheduler.schedule((room.code, "phase"), REVEAL_TIME, _after_reveal, room.code, room.phase_gen, has_next)
+
+
+def _after_reveal(code, gen, has_next, waiting=False):
+    room = _in_phase(code, gen, "reveal")
+    if not room:
+        return
+    if has_next and room.current_question is None and room.streaming:
+        # При потоковой генерации следующий вопрос может ещё не прийти.
+        # game_status — строка статуса в самой игре: экран игры остаётся,
+        # game_loading увёл бы клиента на экран загрузки до конца партии.
+        if not waiting:
+            emit("game_status", {"message": "🤖 GigaChat дописывает вопросы..."}, room=room.code)
+        scheduler.schedule((code, "phase"), STREAM_POLL, _after_reveal, code, gen, True, True)
+        return
+    if waiting:
+        room.q_start_time = time.time()
+
+    if not has_next or room.current_question is None:
+        room.state = "finished"
+        room.phase = "over"
+        limit = AUDIENCE_TOP_K if room.mode == "audience" else None
+        _broadcast(room, "game_over", room.final_results(limit))
+        return
+
+    if room.current_q % 5 == 0 and room.current_q < room.total_questions:
+        room.phase = "interim"
+        # Общий топ-K одной рассылкой, каждому — его место (до топа,
+        # чтобы клиент показал их вместе, как your_result).
+        total = len(room.players)
+        for rank, p in enumerate(room.ranked(), 1):
+            emit("your_rank", {"rank": rank, "score": p.score, "total": total}, room=p.sid)
+        _broadcast(room, "interim_results", {
+            "players":       room.top_players(AUDIENCE_TOP_K),
+            "next_question": room.current_q + 1,
+        })
+        scheduler.schedule((code, "phase"), INTERIM_TIME, _next_question, code, gen)
+        return
+    _emit_question(room)
+
+
+def _next_question(code, gen):
+    room = _in_phase(code, gen, "interim")
+    if room:
         _emit_question(room)
-    else:
-        socketio.emit("game_over", room.final_results(), room=room.code)
+
+
+# Режим «audience»: ответы копятся в room.answer_buffer и разбираются пачкой
+# раз в AUDIENCE_TICK; в эфир уходят гистограмма и топ, каждому — свой итог.
+def _audience_tick(code, gen):
+    room = _in_phase(code, gen, "question")
+    if not room:
+        return
+    _flush_answers(room)
+    if room.all_answered():
+        _resolve_question(room)
+
+
+def _flush_answers(room: Room):
+    q = room.current_question
+    if not room.answer_buffer or not q:
+        return
+    batch, room.answer_buffer = room.answer_buffer, []
+    for sid, ans, t in batch:
+        if room.record_answer(sid, ans, t) is None:
+            continue
+        if ans == q["correct"]:
+            room.award_point(sid)
+        else:
+            room.reset_streak(sid)
+
+
+def _reveal_audience(room: Room, ci, correct_text):
+    # Личный итог уходит раньше общего, чтобы клиент показал их вместе.
+    top = room.top_players(AUDIENCE_TOP_K)
+    for rank, p in enumerate(room.ranked(), 1):
+        emit("your_result", {
+            "answer": p.answer_index, "correct": p.answer_index == ci,
+            "score": p.score, "streak": p.streak, "rank": rank,
+        }, room=p.sid)
+    _broadcast(room, "question_result", {
+        "correct_index":  ci,
+        "correct_answer": correct_text,
+        "histogram":      room.answer_hist,
+        "answered":       room.answered_count,
+        "total_players":  len(room.players),
+        "top":            top,
+        "mode":           room.mode,
+    })
+
+
+def _lobby_payload(room: Room):
+    limit = LOBBY_LIST_MAX if room.mode == "audience" else None
+    return {"players": room.players_list(limit), "total": len(room.players)}
+
+
+def _lobby_update(code):
+    if room := rooms.get(code):
+        _broadcast(room, "players_update", _lobby_payload(room))
+
+
+def _announce_players(room: Room, event, skip_sid=None):
+    # В большой аудитории каждое подключение не рассылаем всем —
+    # одно обновление списка на AUDIENCE_TICK.
+    if room.mode == "audience":
+        if scheduler.time_left((room.code, "lobby")) is None:
+            scheduler.schedule((room.code, "lobby"), AUDIENCE_TICK, _lobby_update, room.code)
+        return
+    _broadcast(room, event, _lobby_payload(room), skip_sid=skip_sid)
+
+
+# Игроки с бинарным форматом (см. wire) сидят ещё и в подкомнате <код>/b,
+# остальные — в <код>/j. Пока бинарных нет, рассылка идёт одним emit.
+def _broadcast(room: Room, event, payload, skip_sid=None):
+    if not room.binary_count:
+        emit(event, payload, room=room.code, skip_sid=skip_sid)
+        return
+    emit(event, payload, room=wire.subroom(room.code, False), skip_sid=skip_sid)
+    emit(event, wire.pack(event, payload, room), room=wire.subroom(room.code, True), skip_sid=skip_sid)
+
+
+def _enter(sid, room: Room, player):
+    socketio.server.enter_room(sid, room.code, namespace="/")
+    socketio.server.enter_room(sid, wire.subroom(room.code, player.binary), namespace="/")
 
 
 def _player_left(sid):
     room = get_room_by_sid(sid)
     if not room:
         return
+    player = room.players.get(sid)
     room.remove_player(sid)
-    leave_room(room.code)
+    socketio.server.leave_room(sid, room.code, namespace="/")
+    if player:
+        socketio.server.leave_room(sid, wire.subroom(room.code, player.binary), namespace="/")
+        if player.team:
+            socketio.server.leave_room(sid, team_channel(room.code, player.team), namespace="/")
     if not room.players:
-        rooms.pop(room.code, None)
+        drop_room(room.code)
+        scheduler.cancel_prefix(room.code)
         return
+    _announce_players(room, "players_update")
     if room.host_sid == sid:
         room.host_sid = room.human_players[0].sid
-    socketio.emit("players_update", {"players": room.players_list()}, room=room.code)
-    socketio.emit("host_changed",   {"host": room.players[room.host_sid].name}, room=room.code)
+        emit("host_changed", {"host": room.players[room.host_sid].name}, room=room.code)
     if room.state == "playing" and room.all_answered():
-        eventlet.spawn(_resolve_question, room)
+        _resolve_question(room)
 
 
+# Обработчики принимают sid явно и отвечают через emit(to=sid):
+# при нескольких воркерах событие исполняется у владельца комнаты, а не
+# там, где висит соединение (см. backend.route).
+_wire_pref: dict[str, bool] = {}
+
 @socketio.on("connect")
-def on_connect():
+def on_connect(auth=None):
+    # Формат выбирается один раз при подключении: auth = {"wire": "msgpack"}.
+    if isinstance(auth, dict) and auth.get("wire") == "msgpack" and wire.available:
+        _wire_pref[request.sid] = True
     logger.debug("connect: %s", request.sid)
 
 @socketio.on("disconnect")
 def on_disconnect():
-    _player_left(request.sid)
+    _wire_pref.pop(request.sid, None)
+    route("disconnect", request.sid)
 
 @socketio.on("leave_room")
 def on_leave_room():
-    _player_left(request.sid)
-
+    route("leave_room", request.sid)
 
 @socketio.on("create_room")
 def on_create_room(data):
+    route("create_room", request.sid, _with_wire(data))
+
+@socketio.on("join_room")
+def on_join_room(data):
+    route("join_room", request.sid, _with_wire(data), code=_room_code(data))
+
+@socketio.on("update_settings")
+def on_update_settings(data):
+    route("update_settings", request.sid, data)
+
+@socketio.on("start_game")
+def on_start_game(data):
+    route("start_game", request.sid, data)
+
+@socketio.on("submit_answer")
+def on_submit_answer(data):
+    route("submit_answer", request.sid, data)
+
+
+def _room_code(data):
+    return (data.get("room_code") or "").strip().upper()
+
+
+def _with_wire(data):
+    # Предпочтение известно только воркеру соединения — везём его в данных.
+    return {**data, "binary": _wire_pref.get(request.sid, False)}
+
+
+@handler("disconnect")
+@handler("leave_room")
+def _handle_leave(sid, _):
+    _player_left(sid)
+
+
+@handler("create_room")
+def _handle_create_room(sid, data):
     name = (data.get("player_name") or "Игрок").strip() or "Игрок"
+    if get_room_by_sid(sid):
+        _player_left(sid)
     code = gen_code()
-    room = Room(code=code, host_sid=request.sid)
-    room.add_player(request.sid, name)
+    room = Room(code=code, host_sid=sid)
+    player = room.add_player(sid, name, bool(data.get("binary")))
     rooms[code] = room
-    join_room(code)
-    emit("room_created", {"room_code": code, "is_host": True, "players": room.players_list()})
+    _enter(sid, room, player)
+    emit("room_created", {"room_code": code, "is_host": True, "id": player.seq,
+                          "binary": player.binary, **_lobby_payload(room)}, to=sid)
 
 
-@socketio.on("join_room")
-def on_join_room(data):
-    code = (data.get("room_code") or "").strip().upper()
+@handler("join_room")
+def _handle_join_room(sid, data):
+    code = _room_code(data)
     name = (data.get("player_name") or "Игрок").strip() or "Игрок"
     if code not in rooms:
-        emit("error", {"message": "Комната не найдена. Проверь код."})
+        emit("error", {"message": "Комната не найдена. Проверь код."}, to=sid)
         return
     room = rooms[code]
-    if room.state != "waiting":
-        emit("error", {"message": "Игра уже началась, войти нельзя."})
+    late = room.mode == "audience" and room.state == "playing"
+    if room.state != "waiting" and not late:
+        emit("error", {"message": "Игра уже началась, войти нельзя."}, to=sid)
         return
-    room.add_player(request.sid, name)
-    join_room(code)
-    emit("room_joined", {"room_code": code, "is_host": False,
-                         "players": room.players_list(), "settings": room.settings})
-    emit("player_joined", {"players": room.players_list()}, room=code, include_self=False)
-
-
-@socketio.on("update_settings")
-def on_update_settings(data):
-    room = get_room_by_sid(request.sid)
-    if not room or room.host_sid != request.sid:
+    # Сокет состоит не больше чем в одной комнате: иначе в старой остался бы
+    # игрок-призрак, которого индекс sid → комната уже не найдёт.
+    if (old := get_room_by_sid(sid)) and old is not room:
+        _player_left(sid)
+    player = room.add_player(sid, name, bool(data.get("binary")))
+    _enter(sid, room, player)
+    emit("room_joined", {"room_code": code, "is_host": False, "id": player.seq,
+                         "binary": player.binary, "settings": room.settings, **_lobby_payload(room)}, to=sid)
+    if late:
+        emit("game_started", {"your_team": None, "mode": room.mode}, to=sid)
+    _announce_players(room, "player_joined", skip_sid=sid)
+    return True
+
+
+@handler("update_settings")
+def _handle_update_settings(sid, data):
+    room = get_room_by_sid(sid)
+    if not room or room.host_sid != sid:
         return
     for k in ("topic", "question_count", "difficulty", "num_options", "game_mode"):
         if k in data:
             room.settings[k] = data[k]
+    room.touched = time.monotonic()
     emit("settings_updated", {"settings": room.settings}, room=room.code)
 
 
-@socketio.on("start_game")
-def on_start_game(_):
-    room = get_room_by_sid(request.sid)
-    if not room or room.host_sid != request.sid or room.state != "waiting":
+_inflight: dict = {}
+# Итоги плюс разбивка по ключу (нормализованная тема, count, сложность,
+# варианты). Ключей бесконечно много: хранится не больше FLIGHT_KEYS_MAX,
+# при переполнении вытесняется самый редкий; наружу — FLIGHT_TOP_N частых.
+flight_stats = {"generated": 0, "coalesced": 0}
+flight_keys: dict = {}
+FLIGHT_KEYS_MAX = 500
+FLIGHT_TOP_N    = int(os.getenv("FLIGHT_TOP_N", "10"))
+
+
+def _count_flight(key, result):
+    flight_stats[result] += 1
+    entry = flight_keys.get(key)
+    if entry is None:
+        if len(flight_keys) >= FLIGHT_KEYS_MAX:
+            del flight_keys[min(flight_keys, key=lambda k: sum(flight_keys[k].values()))]
+        entry = flight_keys[key] = {"generated": 0, "coalesced": 0}
+    entry[result] += 1
+
+
+def flight_top(n=FLIGHT_TOP_N):
+    return sorted(flight_keys.items(), key=lambda kv: -sum(kv[1].values()))[:n]
+
+
+def _load_questions(topic, count, difficulty, num_options, on_queue=None):
+    # Одинаковые запросы, пришедшие пока идёт генерация, ждут её результат,
+    # а не дёргают GigaChat повторно.
+    t0 = time.perf_counter()
+    questions = cache_get((topic, count, difficulty, num_options))
+    if questions:
+        logger.info("📦 Кэш: тема '%s'", topic)
+        GENERATION.observe(time.perf_counter() - t0, "cache")
+        return questions
+    if BANK_FIRST:
+        questions = bank_questions(topic, count, difficulty, num_options, strict=True)
+        if questions:
+            logger.info("📚 Банк вопросов: тема '%s'", topic)
+            GENERATION.observe(time.perf_counter() - t0, "bank")
+            return questions
+
+    key = (normalize_topic(topic), count, difficulty, num_options)
+    if key in _inflight:
+        _count_flight(key, "coalesced")
+        logger.info("🔗 Жду уже идущую генерацию: тема '%s'", topic)
+        return _inflight[key].wait()
+
+    done = Event()
+    _inflight[key] = done
+    _count_flight(key, "generated")
+    try:
+        # В кэш — только ответ GigaChat; банк после ошибки/таймаута не кэшируем.
+        questions = generate_questions_pooled(topic, count, difficulty, num_options,
+                                              on_queue=on_queue, fallback=False)
+        if questions:
+            cache_set((topic, count, difficulty, num_options), questions)
+        else:
+            questions = fallback_questions(topic, count, difficulty, num_options)
+    except Exception as exc:
+        done.send_exception(exc)
+        raise
+    else:
+        done.send(questions)
+        return questions
+    finally:
+        _inflight.pop(key, None)
+
+
+def _should_stream(topic, count, difficulty, num_options):
+    if not GEN_STREAMING or not os.getenv("GIGACHAT_CREDENTIALS"):
+        return False
+    key = (normalize_topic(topic), count, difficulty, num_options)
+    if BANK_FIRST and bank_covers(topic, count, difficulty):
+        return False
+    # Только проверка размера пула: cache_get сделал бы выборку и посчитал
+    # попадание, а _load_questions всё равно сходит в кэш сам.
+    return key not in _inflight and pool_size(topic, difficulty) < count
+
+
+def _stream_game(room: Room, topic, count, difficulty, num_options, on_queue=None):
+    # Игра стартует на первом разобранном вопросе, остальные дописываются
+    # в room.questions на ходу. Параллельные комнаты с той же темой ждут
+    # полный набор через _inflight.
+    key = (normalize_topic(topic), count, difficulty, num_options)
+    done = Event()
+    _inflight[key] = done
+    _count_flight(key, "generated")
+
+    room.questions = []
+    room.expected_questions = count
+    room.streaming = True
+    overloaded = False
+    try:
+        for q in stream_questions(topic, count, difficulty, num_options, on_queue=on_queue, fallback=False):
+            room.questions.append(q)
+            if len(room.questions) == 1:
+                _begin_game(room)
+    except GenerationQueueFull as exc:
+        logger.warning("stream_questions: %s", exc)
+        overloaded = True
+    except Exception as exc:
+        logger.error("stream_questions: %s", exc)
+    finally:
+        room.streaming = False
+
+    if room.questions:
+        cache_set((topic, count, difficulty, num_options), room.questions)
+    elif not overloaded:
+        # Поток ничего не дал — играем из банка, но в кэш его не кладём.
+        room.questions = fallback_questions(topic, count, difficulty, num_options)
+        if room.questions:
+            _begin_game(room)
+    _inflight.pop(key, None)
+
+    questions = list(room.questions)
+    if questions:
+        done.send(questions)
+    else:
+        done.send_exception(RuntimeError("поток не дал ни одного вопроса"))
+        error = "Сервер перегружен. Попробуй через минуту." if overloaded else "Ошибка AI. Попробуй ещё раз."
+        emit("error", {"message": error}, room=room.code)
+
+
+def _begin_game(room: Room):
+    if room.mode == "team":
+        room.assign_teams(lambda sid, old, new: _switch_team(room.code, sid, old, new))
+
+    room.state        = "playing"
+    room.touched      = time.monotonic()
+    room.current_q    = 0
+    room.q_start_time = time.time()
+    room.reset_answers()
+
+    # Одна рассылка на команду (канал <код>/tN) вместо emit каждому игроку.
+    if room.mode == "team":
+        for team in (1, 2):
+            emit("game_started", {"your_team": team, "mode": room.mode}, room=team_channel(room.code, team))
+    else:
+        emit("game_started", {"your_team": None, "mode": room.mode}, room=room.code)
+
+    _emit_question(room)
+
+
+def _switch_team(code, sid, old, new):
+    if old:
+        socketio.server.leave_room(sid, team_channel(code, old), namespace="/")
+    socketio.server.enter_room(sid, team_channel(code, new), namespace="/")
+
+
+@handler("start_game")
+def _handle_start_game(sid, _):
+    room = get_room_by_sid(sid)
+    if not room or room.host_sid != sid or room.state != "waiting":
         return
     if len(room.players) < 2:
-        emit("error", {"message": "Нужно минимум 2 игрока."})
+        emit("error", {"message": "Нужно минимум 2 игрока."}, to=sid)
         return
 
     s           = room.settings
@@ -159,69 +515,68 @@ def on_start_game(_):
     count       = max(1, min(50, int(s.get("question_count", 10))))
     difficulty  = s.get("difficulty", "medium")
     num_options = max(2, min(6, int(s.get("num_options", 4))))
+    warmer.record(topic, difficulty, num_options)
 
     emit("game_loading", {"message": "🤖 GigaChat генерирует вопросы..."}, room=room.code)
 
-    def _start():
-        key = (topic, count, difficulty, num_options)
-        questions = cache_get(key)
-        if questions:
-            logger.info("📦 Кэш: тема '%s'", topic)
-        else:
-            try:
-                questions = generate_questions(topic, count, difficulty, num_options)
-                cache_set(key, questions)
-            except Exception as exc:
-                logger.error("generate_questions: %s", exc)
-                socketio.emit("error", {"message": "Ошибка AI. Попробуй ещё раз."}, room=room.code)
-                return
-
-        if room.mode == "team":
-            room.assign_teams()
-
-        room.questions    = questions
-        room.state        = "playing"
-        room.current_q    = 0
-        room.q_start_time = time.time()
-        room.reset_answers()
-
-        for sid, p in room.players.items():
-            socketio.emit("game_started", {"your_team": p.team, "mode": room.mode}, room=sid)
+    def _on_queue(pos):
+        emit("game_loading", {"message": f"⏳ Вы #{pos} в очереди на генерацию...",
+                                       "queue_position": pos}, room=room.code)
 
-        _emit_question(room)
+    def _start():
+        if _should_stream(topic, count, difficulty, num_options):
+            _stream_game(room, topic, count, difficulty, num_options, _on_queue)
+            return
+        try:
+            questions = _load_questions(topic, count, difficulty, num_options, on_queue=_on_queue)
+        except GenerationQueueFull as exc:
+            logger.warning("generate_questions: %s", exc)
+            emit("error", {"message": "Сервер перегружен. Попробуй через минуту."}, room=room.code)
+            return
+        except Exception as exc:
+            logger.error("generate_questions: %s", exc)
+            emit("error", {"message": "Ошибка AI. Попробуй ещё раз."}, room=room.code)
+            return
+        room.questions = questions
+        _begin_game(room)
 
     eventlet.spawn(_start)
 
 
-@socketio.on("submit_answer")
-def on_submit_answer(data):
-    room   = get_room_by_sid(request.sid)
-    player = room.players.get(request.sid) if room else None
-    if not room or room.state != "playing" or not player or player.answered:
+@handler("submit_answer")
+def _handle_submit_answer(sid, data):
+    t0     = time.perf_counter()
+    room   = get_room_by_sid(sid)
+    player = room.players.get(sid) if room else None
+    if not room or room.state != "playing" or room.phase != "question" or not player or player.answered:
         return
     q = room.current_question
     if not q:
         return
 
     ans        = int(data.get("answer_index", -1))
+    if room.mode == "audience":
+        room.answer_buffer.append((sid, ans, time.time()))
+        if scheduler.time_left((room.code, "audience")) is None:
+            scheduler.schedule((room.code, "audience"), AUDIENCE_TICK, _audience_tick, room.code, room.phase_gen)
+        return
     is_correct = (ans == q["correct"])
 
-    player.answered     = True
-    player.answer_index = ans
-    player.answer_time  = time.time()
+    room.record_answer(sid, ans)
 
-    pts = room.award_point(request.sid) if is_correct else 0
+    pts = room.award_point(sid) if is_correct else 0
     if not is_correct:
-        room.reset_streak(request.sid)
+        room.reset_streak(sid)
 
     if room.mode == "ffa":
         if is_correct and room.ffa_first is None:
-            room.ffa_first = request.sid
-            socketio.emit("ffa_correct", {"player_name": player.name, "points": pts}, room=room.code)
+            room.ffa_first = sid
+            emit("ffa_correct", {"player_name": player.name, "points": pts}, room=room.code)
         if room.ffa_first is not None or room.all_answered():
-            eventlet.spawn(_resolve_question, room)
+            _resolve_question(room)
         return
 
-    emit("answer_ack", {"correct": is_correct, "points": pts, "streak": player.streak})
+    emit("answer_ack", {"correct": is_correct, "points": pts, "streak": player.streak}, to=sid)
+    SUBMIT.observe(time.perf_counter() - t0)
     if room.all_answered():
-        eventlet.spawn(_resolve_question, room)
+        _resolve_question(room)
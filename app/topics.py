@@ -0,0 +1,19 @@
+import re
+
+_TOPIC_JUNK = re.compile(r"[^\w\s]+")
+_RU_ENDINGS = sorted((
+    "иями", "ями", "ами", "ией", "иям", "ием", "иях", "ого", "его", "ому", "ему",
+    "ыми", "ими", "ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ие", "ые",
+    "ов", "ев", "ам", "ям", "ах", "ях", "ом", "ем", "ия", "ию", "ии",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+), key=len, reverse=True)
+
+def _stem(word):
+    for end in _RU_ENDINGS:
+        if word.endswith(end) and len(word) - len(end) >= 3:
+            return word[:-len(end)]
+    return word
+
+def normalize_topic(topic):
+    words = _TOPIC_JUNK.sub(" ", str(topic).lower().replace("ё", "е")).split()
+    return " ".join(_stem(w) for w in words)
@@ -0,0 +1,107 @@
+import os, time, logging
+import eventlet
+from .game_logic import cache_set, pool_size, _CACHE
+from .topics import normalize_topic
+from .scheduler import scheduler
+from .ai_client import pregenerate, generation_idle
+
+logger = logging.getLogger(__name__)
+
+# Популярные темы догенерируются заранее: start_game отмечает тему, раз в
+# WARM_INTERVAL самая популярная тема с неполным пулом получает ещё порцию
+# вопросов — если генерация простаивает, есть бюджет WARM_PER_HOUR и кэш
+# не перерос WARM_MAX_QUESTIONS. Готовые вопросы кладутся в тот же пул
+# кэша, из которого берёт cache_get.
+WARM_INTERVAL      = float(os.getenv("WARM_INTERVAL", "60"))
+WARM_TOP_N         = int(os.getenv("WARM_TOP_N", "5"))
+WARM_POOL_SIZE     = int(os.getenv("WARM_POOL_SIZE", "30"))
+WARM_BATCH         = int(os.getenv("WARM_BATCH", "10"))
+WARM_PER_HOUR      = float(os.getenv("WARM_PER_HOUR", "20"))
+WARM_MAX_QUESTIONS = int(os.getenv("WARM_MAX_QUESTIONS", str(_CACHE.max_questions // 2)))
+WARM_HALF_LIFE     = float(os.getenv("WARM_HALF_LIFE", "3600"))
+POPULAR_MAX        = 1000
+
+# (нормализованная тема, сложность) → [вес, время обновления, тема как ввели, num_options]
+_popular: dict = {}
+_tokens = WARM_PER_HOUR
+_refilled = time.monotonic()
+_busy = False
+warm_stats = {"recorded": 0, "runs": 0, "questions": 0, "empty": 0, "skipped_budget": 0, "skipped_memory": 0}
+
+
+def _decayed(entry, now):
+    return entry[0] * 0.5 ** ((now - entry[1]) / WARM_HALF_LIFE)
+
+
+def record(topic, difficulty, num_options=4):
+    now = time.monotonic()
+    key = (normalize_topic(topic), difficulty)
+    entry = _popular.get(key)
+    if entry:
+        entry[:] = [_decayed(entry, now) + 1, now, topic, num_options]
+    else:
+        if len(_popular) >= POPULAR_MAX:
+            del _popular[min(_popular, key=lambda k: _decayed(_popular[k], now))]
+        _popular[key] = [1.0, now, topic, num_options]
+    warm_stats["recorded"] += 1
+
+
+def top(n=WARM_TOP_N):
+    now = time.monotonic()
+    return sorted(_popular.items(), key=lambda kv: -_decayed(kv[1], now))[:n]
+
+
+def _candidate():
+    for (_, difficulty), (_, _, topic, num_options) in top():
+        if pool_size(topic, difficulty) < WARM_POOL_SIZE:
+            return topic, difficulty, num_options
+    return None
+
+
+def _warm(topic, difficulty, num_options):
+    global _busy
+    try:
+        need = min(WARM_BATCH, WARM_POOL_SIZE - pool_size(topic, difficulty))
+        qs = pregenerate(topic, need, difficulty, num_options)[:need]
+        if qs:
+            cache_set((topic, len(qs), difficulty, num_options), qs)
+            warm_stats["questions"] += len(qs)
+            logger.info("🔥 Прогрев: +%d вопросов по теме '%s' (%s)", len(qs), topic, difficulty)
+        else:
+            warm_stats["empty"] += 1
+    finally:
+        _busy = False
+
+
+def tick():
+    global _tokens, _refilled, _busy
+    now = time.monotonic()
+    _tokens = min(WARM_PER_HOUR, _tokens + (now - _refilled) * WARM_PER_HOUR / 3600)
+    _refilled = now
+    if _busy or not os.getenv("GIGACHAT_CREDENTIALS") or not generation_idle():
+        return
+    target = _candidate()
+    if not target:
+        return
+    if _tokens < 1:
+        warm_stats["skipped_budget"] += 1
+        return
+    if _CACHE.info()["questions"] + WARM_BATCH > WARM_MAX_QUESTIONS:
+        warm_stats["skipped_memory"] += 1
+        return
+    _tokens -= 1
+    _busy = True
+    warm_stats["runs"] += 1
+    eventlet.spawn_n(_warm, *target)
+
+
+def _tick():
+    try:
+        tick()
+    finally:
+        scheduler.schedule(("warmer",), WARM_INTERVAL, _tick)
+
+
+def start():
+    if scheduler.time_left(("warmer",)) is None:
+        scheduler.schedule(("warmer",), WARM_INTERVAL, _tick)
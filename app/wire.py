@@ -0,0 +1,112 @@
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Компактный бинарный формат для тяжёлых событий игры. Клиент просит его
+# при подключении (auth: {wire: "msgpack"}); такие игроки сидят в подкомнате
+# <код>/b и получают msgpack с позиционными полями и номерами игроков
+# (Player.seq) вместо sid, остальные — обычный JSON в <код>/j. Обратное
+# преобразование — Wire.expand в static/js/game.js; поля ниже и там должны
+# совпадать. Замер размера и стоимости: python -m app.wire.
+
+available = msgpack is not None
+
+
+def subroom(code, binary):
+    return code + ("/b" if binary else "/j")
+
+
+def _player(p):
+    return [p["name"], p["score"], p["team"], int(p.get("is_host", False)), p["total_correct"]]
+
+
+def _teams(ts):
+    return [ts[1], ts[2]] if ts else None
+
+
+def _new_question(d, room):
+    q = d["question"]
+    return [q["question"], list(q["options"]), d["question_number"], d["total_questions"],
+            d["time_limit"], d["mode"], d.get("turn_team"), _teams(d.get("team_scores"))]
+
+
+def _question_result(d, room):
+    if "histogram" in d:
+        return [d["correct_index"], d["correct_answer"], d["mode"],
+                sorted(d["histogram"].items()), d["answered"], d["total_players"],
+                [[p["name"], p["score"]] for p in d["top"]]]
+    rows = []
+    for sid, a in d["player_answers"].items():
+        p = room.players.get(sid)
+        if p:
+            rows.append([p.seq, a["answer"], int(a["correct"]), a["streak"], d["scores"].get(sid, 0)])
+    return [d["correct_index"], d["correct_answer"], d["mode"], rows, _teams(d.get("team_scores"))]
+
+
+def _players(d, room):
+    return [d["total"], [_player(p) for p in d["players"]]]
+
+
+def _interim(d, room):
+    return [d["next_question"], [_player(p) for p in d["players"]]]
+
+
+def _game_over(d, room):
+    return [d["mode"], [[p["rank"], p["name"], p["score"], p["team"], p["total_correct"]] for p in d["players"]],
+            _teams(d.get("team_scores")), d.get("winner")]
+
+
+ENCODERS = {
+    "new_question":    _new_question,
+    "question_result": _question_result,
+    "players_update":  _players,
+    "player_joined":   _players,
+    "interim_results": _interim,
+    "game_over":       _game_over,
+}
+
+
+def pack(event, payload, room):
+    return msgpack.packb(ENCODERS[event](payload, room), use_bin_type=True)
+
+
+if __name__ == "__main__":
+    # Байты на игру (сумма по всем получателям) и цена кодирования: JSON vs msgpack.
+    import json, random, timeit
+    from .game_logic import Room, _sid_room
+
+    players, questions = 30, 10
+    rng = random.Random(0)
+    room = Room(code="WIRE", host_sid="p0", settings={"game_mode": "classic"})
+    for i in range(players):
+        room.add_player(f"{'x' * 16}{i:04d}", f"Игрок {i}")
+    events = []
+    for n in range(1, players + 1):
+        events.append(("player_joined", {"players": room.players_list()[:n], "total": n}, n))
+    sids = list(room.players)
+    for qn in range(questions):
+        events.append(("new_question", {
+            "question": {"question": f"Сколько будет {qn} + {qn}?", "options": ("1", "2", "3", "4")},
+            "question_number": qn + 1, "total_questions": questions, "time_limit": 30, "mode": "classic"}, players))
+        for sid in sids:
+            room.players[sid].score += rng.randrange(0, 200)
+        events.append(("question_result", {
+            "correct_index": 2, "correct_answer": "3",
+            "player_answers": {s: {"answer": rng.randrange(4), "correct": rng.random() < .5, "streak": 1} for s in sids},
+            "scores": {s: room.players[s].score for s in sids}, "team_scores": None, "mode": "classic"}, players))
+        if qn % 5 == 4:
+            events.append(("interim_results", {"players": [p.to_dict() for p in room.players.values()],
+                                               "next_question": qn + 2}, players))
+    events.append(("game_over", room.final_results(), players))
+
+    size_json = sum(len(json.dumps(d)) * k for _, d, k in events)
+    size_bin = sum(len(pack(e, d, room)) * k for e, d, k in events)
+    t_json = min(timeit.repeat(lambda: [json.dumps(d) for _, d, _ in events], number=50, repeat=5)) / 50
+    t_bin = min(timeit.repeat(lambda: [pack(e, d, room) for e, d, _ in events], number=50, repeat=5)) / 50
+    print(f"Игра: {players} игроков, {questions} вопросов, {len(events)} рассылок")
+    print(f"  JSON     {size_json / 1024:8.1f} КБ на игру, кодирование {t_json * 1000:.2f} мс")
+    print(f"  msgpack  {size_bin / 1024:8.1f} КБ на игру, кодирование {t_bin * 1000:.2f} мс "
+          f"({size_bin / size_json:.0%} объёма)")
+    for sid in sids:
+        del _sid_room[sid]
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Нагрузочный тест: поднимает сервер со встроенным банком вопросов (или бьёт
+# по --url) и гоняет тысячи симулированных игроков через настоящий протокол
+# Socket.IO: create_room → join_room → start_game → submit_answer → leave_room.
+#
+#   python loadtest.py --rooms 200 --room-size 10 --mode classic --answer-time exp:3
+#
+# На тысячи соединений может понадобиться `ulimit -n 65536`.
+import eventlet
+eventlet.monkey_patch()
+
+import os, sys, json, time, base64, random, socket, struct, argparse, subprocess, threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+from eventlet.event import Event
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.socket_events import REVEAL_TIME, INTERIM_TIME, TIME_PER_Q
+
+SERVER = """
+import logging
+logging.basicConfig(level=logging.WARNING)
+from app import create_app, socketio
+socketio.run(create_app(), host="127.0.0.1", port={port}, log_output=False)
+"""
+
+
+class Stats:
+    def __init__(self):
+        self.lat = defaultdict(list)
+        self.sent = 0
+        self.received = 0
+        self.errors = defaultdict(int)
+        self.games = 0
+        self.rss = []
+
+
+def answer_delay(spec, rng):
+    # fixed:S | uniform:A:B | exp:MEAN | normal:MU:SIGMA, в секундах
+    kind, *p = spec.split(":")
+    p = [float(x) for x in p]
+    if kind == "fixed":
+        d = p[0]
+    elif kind == "uniform":
+        d = rng.uniform(p[0], p[1])
+    elif kind == "exp":
+        d = rng.expovariate(1 / p[0])
+    elif kind == "normal":
+        d = rng.gauss(p[0], p[1])
+    else:
+        raise ValueError(f"неизвестное распределение: {spec}")
+    return min(max(d, 0.0), TIME_PER_Q - 0.5)
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class WebSocket:
+    # Минимальный клиент RFC 6455: текстовые и бинарные кадры, ping/pong, close.
+
+    def __init__(self, url):
+        u = urlsplit(url)
+        self.sock = socket.create_connection((u.hostname, u.port or 80))
+        self.lock = threading.Lock()
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((f"GET {u.path}?{u.query} HTTP/1.1\r\nHost: {u.netloc}\r\n"
+                           "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                           f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        self.f = self.sock.makefile("rb")
+        status = self.f.readline()
+        if b" 101 " not in status:
+            raise ConnectionError(status.decode(errors="replace").strip())
+        while self.f.readline() not in (b"\r\n", b""):
+            pass
+
+    def send(self, data, opcode=None):
+        payload = data if isinstance(data, bytes) else data.encode()
+        n = len(payload)
+        head = bytes([0x80 | (opcode or (2 if isinstance(data, bytes) else 1))])
+        if n < 126:
+            head += bytes([0x80 | n])
+        elif n < 65536:
+            head += bytes([0xFE]) + struct.pack("!H", n)
+        else:
+            head += bytes([0xFF]) + struct.pack("!Q", n)
+        mask = os.urandom(4)
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes((mask * (n // 4 + 1))[:n], "big")).to_bytes(n, "big")
+        try:
+            with self.lock:
+                self.sock.sendall(head + mask + masked)
+        except OSError as exc:
+            raise ConnectionClosed(exc)
+
+    def receive(self):
+        chunks, kind = [], None
+        while True:
+            head = self.f.read(2)
+            if len(head) < 2:
+                raise ConnectionClosed("eof")
+            fin, opcode, n = head[0] & 0x80, head[0] & 0x0F, head[1] & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", self.f.read(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", self.f.read(8))[0]
+            payload = self.f.read(n)
+            if opcode == 8:
+                raise ConnectionClosed("close")
+            if opcode == 9:
+                self.send(payload, opcode=10)
+                continue
+            if opcode == 10:
+                continue
+            kind = kind or opcode
+            chunks.append(payload)
+            if fin:
+                data = b"".join(chunks)
+                return data.decode() if kind == 1 else data
+
+    def close(self):
+        try:
+            self.send(b"", opcode=8)
+        except ConnectionClosed:
+            pass
+        self.sock.close()
+
+
+class SimClient:
+    # Минимальный клиент Engine.IO v4 / Socket.IO v5 поверх websocket.
+
+    def __init__(self, url, stats, args, rng):
+        self.stats, self.args, self.rng = stats, args, rng
+        self.ws = WebSocket(url.replace("http", "ws", 1) + "/socket.io/?EIO=4&transport=websocket")
+        self.ws.receive()            # 0{"sid":..., "pingInterval":...}
+        self.ws.send("40")
+        self.ws.receive()            # 40{"sid":...}
+        self.waiters = defaultdict(Event)
+        self.team = None
+        self.pending_submit = None
+        self.last = None
+        eventlet.spawn_n(self._loop)
+
+    def emit(self, event, data=None):
+        self.ws.send("42" + json.dumps([event, data] if data is not None else [event]))
+        self.stats.sent += 1
+
+    def wait(self, event, timeout):
+        with eventlet.Timeout(timeout):
+            return self.waiters[event].wait()
+
+    def close(self):
+        try:
+            self.emit("leave_room")
+            self.ws.close()
+        except ConnectionClosed:
+            pass
+
+    def _loop(self):
+        try:
+            while True:
+                msg = self.ws.receive()
+                if msg == "2":
+                    self.ws.send("3")
+                elif msg.startswith("42"):
+                    name, *rest = json.loads(msg[2:])
+                    self.stats.received += 1
+                    self._on(name, rest[0] if rest else None, time.perf_counter())
+        except ConnectionClosed:
+            return
+
+    def _on(self, name, data, now):
+        st = self.stats
+        if name == "new_question":
+            if self.last is not None:
+                kind, t = self.last
+                gap = INTERIM_TIME if kind == "interim_results" else REVEAL_TIME
+                st.lat["new_question"].append(now - t - gap)
+            elif self.waiters["game_started"].ready() and hasattr(self, "started_at"):
+                st.lat["first_question"].append(now - self.started_at)
+            if data.get("mode") != "team" or data.get("turn_team") == self.team:
+                eventlet.spawn_after(answer_delay(self.args.answer_time, self.rng), self._submit,
+                                     len(data["question"]["options"]))
+        elif name == "answer_ack" and self.pending_submit:
+            st.lat["answer_ack"].append(now - self.pending_submit)
+            self.pending_submit = None
+        elif name == "your_result" and self.pending_submit:
+            st.lat["your_result"].append(now - self.pending_submit)
+            self.pending_submit = None
+        elif name in ("question_result", "interim_results"):
+            self.last = (name, now)
+        elif name == "game_started":
+            self.team = data.get("your_team")
+        elif name == "error":
+            st.errors[data.get("message", "?")] += 1
+        ev = self.waiters[name]
+        if not ev.ready():
+            ev.send(data)
+
+    def _submit(self, n_options):
+        self.pending_submit = time.perf_counter()
+        try:
+            self.emit("submit_answer", {"answer_index": self.rng.randrange(n_options)})
+        except ConnectionClosed:
+            pass
+
+
+def run_room(i, url, stats, args):
+    rng = random.Random(args.seed + i)
+    players = []
+    try:
+        host = SimClient(url, stats, args, rng)
+        players.append(host)
+        host.emit("create_room", {"player_name": f"host{i}"})
+        code = host.wait("room_created", args.timeout)["room_code"]
+        for j in range(args.room_size - 1):
+            p = SimClient(url, stats, args, rng)
+            players.append(p)
+            p.emit("join_room", {"player_name": f"p{i}-{j}", "room_code": code})
+            p.wait("room_joined", args.timeout)
+        host.emit("update_settings", {"game_mode": args.mode, "question_count": args.questions,
+                                      "topic": args.topic, "num_options": 4})
+        t0 = time.perf_counter()
+        for p in players:
+            p.started_at = t0
+        host.emit("start_game", {})
+        game_len = args.questions * (TIME_PER_Q + REVEAL_TIME + 1) + args.timeout
+        for p in players:
+            p.wait("game_over", game_len - (time.perf_counter() - t0))
+        stats.games += 1
+    except eventlet.Timeout:
+        stats.errors["timeout"] += 1
+    except (OSError, ConnectionClosed) as exc:
+        stats.errors[type(exc).__name__] += 1
+    finally:
+        for p in players:
+            p.close()
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def start_server(port):
+    env = {**os.environ, "GIGACHAT_CREDENTIALS": "", "CACHE_DB": ""}
+    proc = subprocess.Popen([sys.executable, "-c", SERVER.format(port=port)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("сервер не поднялся")
+
+
+def pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] * 1000 if xs else float("nan")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Нагрузочный тест QuizBattle")
+    ap.add_argument("--url", help="адрес работающего сервера; без него поднимается свой")
+    ap.add_argument("--pid", type=int, help="pid сервера для замера RSS при --url")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--rooms", type=int, default=20)
+    ap.add_argument("--room-size", type=int, default=8)
+    ap.add_argument("--mode", default="classic", choices=("classic", "ffa", "team", "audience"))
+    ap.add_argument("--questions", type=int, default=5)
+    ap.add_argument("--topic", default="Общие знания")
+    ap.add_argument("--answer-time", default="uniform:1:5",
+                    help="fixed:S | uniform:A:B | exp:MEAN | normal:MU:SIGMA")
+    ap.add_argument("--ramp", type=float, default=5.0, help="за сколько секунд запустить все комнаты")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", action="store_true", help="вывести итог одной строкой JSON")
+    args = ap.parse_args()
+
+    proc = None
+    url, pid = args.url, args.pid
+    if not url:
+        proc = start_server(args.port)
+        url, pid = f"http://127.0.0.1:{args.port}", proc.pid
+
+    stats = Stats()
+    t0 = time.perf_counter()
+    pool = eventlet.GreenPool(args.rooms + 1)
+    for i in range(args.rooms):
+        pool.spawn_n(run_room, i, url, stats, args)
+        eventlet.sleep(args.ramp / max(1, args.rooms))
+
+    def sample_rss():
+        while pid:
+            if (mb := rss_mb(pid)) is not None:
+                stats.rss.append(mb)
+            eventlet.sleep(1)
+    sampler = eventlet.spawn(sample_rss)
+    pool.waitall()
+    elapsed = time.perf_counter() - t0
+    sampler.kill()
+    if proc:
+        proc.terminate()
+        proc.wait()
+
+    report = {
+        "clients": args.rooms * args.room_size,
+        "games": f"{stats.games}/{args.rooms}",
+        "elapsed_s": round(elapsed, 1),
+        "sent_per_s": round(stats.sent / elapsed, 1),
+        "received_per_s": round(stats.received / elapsed, 1),
+        "rss_mb_max": round(max(stats.rss), 1) if stats.rss else None,
+        "errors": dict(stats.errors),
+    }
+    for name, xs in stats.lat.items():
+        report[name] = {"n": len(xs), "p50_ms": round(pct(xs, 0.5), 2), "p99_ms": round(pct(xs, 0.99), 2)}
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+        return
+    for k, v in report.items():
+        print(f"{k:16} {v}")
+
+
+if __name__ == "__main__":
+    main()
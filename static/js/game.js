@@ -1,5 +1,84 @@
-const socket = io();
+// ?wire=msgpack — тяжёлые события приходят компактным msgpack (см. app/wire.py).
+const WIRE   = new URLSearchParams(location.search).get('wire') === 'msgpack' ? 'msgpack' : 'json';
+const socket = io({ auth: { wire: WIRE } });
+let myId = null;
+
+const Wire = {
+    decode(buf) {
+        const v = new DataView(buf), u8 = new Uint8Array(buf), td = new TextDecoder();
+        let o = 0;
+        const str = n => td.decode(u8.subarray(o, o += n));
+        const arr = n => { const a = []; while (n--) a.push(read()); return a; };
+        const map = n => { const m = {}; while (n--) { const k = read(); m[k] = read(); } return m; };
+        function read() {
+            const t = u8[o++];
+            if (t < 0x80) return t;
+            if (t < 0x90) return map(t & 0x0f);
+            if (t < 0xa0) return arr(t & 0x0f);
+            if (t < 0xc0) return str(t & 0x1f);
+            if (t >= 0xe0) return t - 0x100;
+            let r;
+            switch (t) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xca: r = v.getFloat32(o); o += 4; return r;
+                case 0xcb: r = v.getFloat64(o); o += 8; return r;
+                case 0xcc: return u8[o++];
+                case 0xcd: r = v.getUint16(o); o += 2; return r;
+                case 0xce: r = v.getUint32(o); o += 4; return r;
+                case 0xcf: r = Number(v.getBigUint64(o)); o += 8; return r;
+                case 0xd0: return v.getInt8(o++);
+                case 0xd1: r = v.getInt16(o); o += 2; return r;
+                case 0xd2: r = v.getInt32(o); o += 4; return r;
+                case 0xd3: r = Number(v.getBigInt64(o)); o += 8; return r;
+                case 0xd9: return str(u8[o++]);
+                case 0xda: r = v.getUint16(o); o += 2; return str(r);
+                case 0xdb: r = v.getUint32(o); o += 4; return str(r);
+                case 0xdc: r = v.getUint16(o); o += 2; return arr(r);
+                case 0xdd: r = v.getUint32(o); o += 4; return arr(r);
+                case 0xde: r = v.getUint16(o); o += 2; return map(r);
+                case 0xdf: r = v.getUint32(o); o += 4; return map(r);
+            }
+            throw new Error(`msgpack: тип 0x${t.toString(16)}`);
+        }
+        return read();
+    },
+    // Обратно к виду JSON-событий; номер игрока myId становится socket.id.
+    expand(ev, a) {
+        const teams  = t => t && { 1: t[0], 2: t[1] };
+        const player = p => ({ name: p[0], score: p[1], team: p[2], is_host: !!p[3], total_correct: p[4] });
+        const key    = id => id === myId ? socket.id : `p${id}`;
+        switch (ev) {
+            case 'new_question':
+                return { question: { question: a[0], options: a[1] }, question_number: a[2], total_questions: a[3],
+                         time_limit: a[4], mode: a[5], turn_team: a[6], team_scores: teams(a[7]) };
+            case 'question_result':
+                if (a.length === 7)
+                    return { correct_index: a[0], correct_answer: a[1], mode: a[2], histogram: Object.fromEntries(a[3]),
+                             answered: a[4], total_players: a[5], top: a[6].map(([name, score]) => ({ name, score })) };
+                return { correct_index: a[0], correct_answer: a[1], mode: a[2], team_scores: teams(a[4]),
+                         player_answers: Object.fromEntries(a[3].map(r => [key(r[0]), { answer: r[1], correct: !!r[2], streak: r[3] }])),
+                         scores: Object.fromEntries(a[3].map(r => [key(r[0]), r[4]])) };
+            case 'players_update':
+            case 'player_joined':
+                return { total: a[0], players: a[1].map(player) };
+            case 'interim_results':
+                return { next_question: a[0], players: a[1].map(player) };
+            case 'game_over':
+                return { mode: a[0], team_scores: teams(a[2]), winner: a[3],
+                         players: a[1].map(p => ({ rank: p[0], name: p[1], score: p[2], team: p[3], total_correct: p[4] })) };
+        }
+        return a;
+    },
+};
+
+function on(ev, fn) {
+    socket.on(ev, data => fn(data instanceof ArrayBuffer ? Wire.expand(ev, Wire.decode(data)) : data));
+}
 let timerInterval = null;
+let lastOwn = null;
+let lastRank = null;
 
 const $ = id => document.getElementById(id);
 
@@ -43,7 +122,7 @@ function stopTimer() {
     if (el) el.style.animation = '';
 }
 
-function renderPlayers(players) {
+function renderPlayers(players, total) {
     const list = $('players-list');
     if (!list) return;
     list.innerHTML = players.map(p => `
@@ -53,11 +132,11 @@ function renderPlayers(players) {
             ${p.is_host ? '<span class="badge-host">👑 Хост</span>' : ''}
             ${p.team  ? `<span class="badge-team team-${p.team}">Команда ${p.team}</span>` : ''}
         </li>`).join('');
-    $('players-count').textContent = `(${players.length})`;
+    $('players-count').textContent = `(${total ?? players.length})`;
 }
 
 const DIFF  = { easy:'😊 Лёгкая', medium:'🧠 Средняя', hard:'🔥 Сложная' };
-const MODES = { classic:'🏆 Классика', ffa:'⚡ Все против всех', team:'🤝 Командный' };
+const MODES = { classic:'🏆 Классика', ffa:'⚡ Все против всех', team:'🤝 Командный', audience:'📺 Аудитория' };
 
 function renderGuestSettings(s) {
     if (!s) return;
@@ -85,6 +164,7 @@ function updateModeDesc() {
         classic: '🏆 <b>Классика</b> — все отвечают одновременно, очки за скорость.',
         ffa:     '⚡ <b>Все против всех</b> — только первый правильный ответ приносит очки.',
         team:    '🤝 <b>Командный бой</b> — команды ходят по очереди.',
+        audience: '📺 <b>Аудитория</b> — для тысяч зрителей: статистика ответов и топ-10.',
     };
     const el = $('mode-desc');
     if (el) el.innerHTML = descs[$('s-mode')?.value] || '';
@@ -163,9 +243,10 @@ $('btn-leave-game')?.addEventListener('click', () => confirm('Выйти из и
 $('btn-again')?.addEventListener('click',      () => showView('main'));
 
 socket.on('room_created', data => {
+    myId = data.id;
     showView('lobby');
     $('lobby-code').textContent = data.room_code;
-    renderPlayers(data.players);
+    renderPlayers(data.players, data.total);
     $('btn-leave-lobby').style.display = 'inline-block';
     $('host-settings').style.display   = 'block';
     $('guest-settings').style.display  = 'none';
@@ -175,9 +256,10 @@ socket.on('room_created', data => {
 });
 
 socket.on('room_joined', data => {
+    myId = data.id;
     showView('lobby');
     $('lobby-code').textContent = data.room_code;
-    renderPlayers(data.players);
+    renderPlayers(data.players, data.total);
     $('btn-leave-lobby').style.display = 'inline-block';
     $('host-settings').style.display   = 'none';
     $('guest-settings').style.display  = 'block';
@@ -185,8 +267,8 @@ socket.on('room_joined', data => {
     renderGuestSettings(data.settings);
 });
 
-socket.on('player_joined',   data => { renderPlayers(data.players); toast('👋 Новый игрок!', 'success'); });
-socket.on('players_update',  data => renderPlayers(data.players));
+on('player_joined',   data => { renderPlayers(data.players, data.total); toast('👋 Новый игрок!', 'success'); });
+on('players_update',  data => renderPlayers(data.players, data.total));
 socket.on('host_changed',    data => toast(`👑 Новый хост: ${data.host}`, 'info'));
 
 socket.on('settings_updated', data => {
@@ -202,15 +284,19 @@ socket.on('game_loading', data => {
     $('loading-msg').textContent = data.message;
 });
 
+socket.on('game_status', data => {
+    $('g-status').textContent = data.message;
+});
+
 socket.on('game_started', data => {
     showView('game');
     $('g-score').textContent    = '0';
-    $('g-mode-badge').textContent = { classic:'🏆 Классика', ffa:'⚡ FFA', team:`🤝 Команда ${data.your_team}` }[data.mode] || '';
+    $('g-mode-badge').textContent = { classic:'🏆 Классика', ffa:'⚡ FFA', team:`🤝 Команда ${data.your_team}`, audience:'📺 Аудитория' }[data.mode] || '';
     const teamEl = $('g-team');
     if (data.your_team && teamEl) { teamEl.textContent = `Команда ${data.your_team}`; teamEl.style.display = 'inline-block'; }
 });
 
-socket.on('new_question', data => {
+on('new_question', data => {
     $('question-result-panel').style.display = 'none';
     $('g-qnum').textContent    = `Вопрос ${data.question_number} / ${data.total_questions}`;
     $('g-progress').style.width = `${data.question_number / data.total_questions * 100}%`;
@@ -252,8 +338,34 @@ socket.on('answer_ack', data => {
     }
 });
 
-socket.on('question_result', data => {
+socket.on('your_result', data => { lastOwn = data; });
+socket.on('your_rank',   data => { lastRank = data; });
+
+function showAudienceResult(data) {
+    const own = lastOwn || {};
+    highlightAnswers(data.correct_index, { [socket.id]: own });
+    $('g-score').textContent = own.score ?? 0;
+
+    const title = $('result-title');
+    title.textContent = own.correct ? `✅ Правильно! Место: ${own.rank}` : `❌ Неверно! Место: ${own.rank ?? '—'}`;
+    title.style.color = own.correct ? '#28a745' : '#dc3545';
+
+    const LETTERS = ['A','B','C','D','E','F'];
+    const hist = Object.entries(data.histogram || {})
+        .filter(([i]) => i >= 0)
+        .map(([i, n]) => `<div class="score-row-item">${LETTERS[i]}: ${n} (${Math.round(n / Math.max(1, data.answered) * 100)}%)</div>`);
+    const top = data.top.map((p, i) => `<div class="score-row-item">${i+1}. ${p.name} — ${p.score} очков</div>`);
+    $('qr-scores').innerHTML = [...hist, ...top].join('');
+
+    const panel = $('question-result-panel');
+    panel.style.display = 'block';
+    setTimeout(() => panel.style.display = 'none', 3000);
+    lastOwn = null;
+}
+
+on('question_result', data => {
     stopTimer();
+    if (data.mode === 'audience') return showAudienceResult(data);
     highlightAnswers(data.correct_index, data.player_answers);
     $('g-score').textContent = data.scores[socket.id] || 0;
 
@@ -275,14 +387,18 @@ socket.on('question_result', data => {
     setTimeout(() => panel.style.display = 'none', 3000);
 });
 
-socket.on('interim_results', data => {
+on('interim_results', data => {
     const panel = $('question-result-panel');
     $('result-title').innerHTML = '📊 Промежуточные результаты';
     $('result-title').style.color = '#ffd700';
+    const own = lastRank
+        ? `<div class="score-row-item"><b>Ваше место: ${lastRank.rank} из ${lastRank.total} — ${lastRank.score} очков</b></div>`
+        : '';
     $('qr-scores').innerHTML =
         [...data.players].sort((a,b) => b.score - a.score)
         .map((p,i) => `<div class="score-row-item">${i+1}. ${p.name} — ${p.score} очков</div>`)
-        .join('');
+        .join('') + own;
+    lastRank = null;
     panel.style.display = 'block';
     setTimeout(() => panel.style.display = 'none', 5000);
 });
@@ -295,7 +411,7 @@ socket.on('ffa_correct', data => {
     setTimeout(() => f.style.display = 'none', 2500);
 });
 
-socket.on('game_over', data => {
+on('game_over', data => {
     stopTimer();
     showView('results');
     const MEDALS = {1:'🥇', 2:'🥈', 3:'🥉'};
@@ -319,6 +435,7 @@ socket.on('game_over', data => {
 });
 
 socket.on('error',      data => { toast(`❌ ${data.message}`, 'error', 4000); showView('main'); });
+socket.on('room_closed', data => { toast(`🧹 ${data.message}`, 'info', 6000); showView('main'); });
 socket.on('disconnect', ()   => toast('⚠️ Соединение потеряно. Обновите страницу.', 'error', 10000));
 
 window.addEventListener('load', () => { updateModeDesc(); $('create-name')?.focus(); });
@@ -0,0 +1,61 @@
+import os, time
+
+os.environ["CACHE_DB"] = ""
+os.environ.pop("GIGACHAT_CREDENTIALS", None)
+
+import eventlet
+import pytest
+from app import create_app, socketio
+from app import socket_events as se
+from app.game_logic import rooms
+
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app()
+
+
+def received(client):
+    return [(m["name"], m["args"][0] if m["args"] else None) for m in client.get_received()]
+
+
+def settle(pred=None, timeout=2.0):
+    # Даём хабу eventlet отработать таймеры и гринлеты, пока не выполнится pred.
+    deadline = time.monotonic() + timeout
+    while True:
+        eventlet.sleep(0.005)
+        if pred is None or pred() or time.monotonic() > deadline:
+            return
+
+
+def start(cs, code):
+    cs[0].emit("start_game", {})
+    settle(lambda: rooms[code].state == "playing")
+    assert rooms[code].state == "playing"
+
+
+@pytest.fixture
+def make_room(app, monkeypatch):
+    # Комната из n тестовых клиентов; cs[0] — хозяин. Раскрытие и
+    # промежуточные итоги без пауз, чтобы игры шли в темпе теста.
+    monkeypatch.setattr(se, "REVEAL_TIME", 0)
+    monkeypatch.setattr(se, "INTERIM_TIME", 0)
+    monkeypatch.setattr(se, "AUDIENCE_TICK", 0)
+    made = []
+
+    def make(n, **settings):
+        cs = [socketio.test_client(app) for _ in range(n)]
+        made.extend(cs)
+        cs[0].emit("create_room", {"player_name": "host"})
+        code = next(a for e, a in received(cs[0]) if e == "room_created")["room_code"]
+        for i, c in enumerate(cs[1:], 1):
+            c.emit("join_room", {"player_name": f"p{i}", "room_code": code})
+        if settings:
+            cs[0].emit("update_settings", settings)
+        return cs, code
+
+    yield make
+    for c in made:
+        if c.is_connected():
+            c.disconnect()
+    settle()
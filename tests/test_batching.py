@@ -0,0 +1,89 @@
+import threading, time
+import pytest
+from app import ai_client
+from app.ai_client import _CircuitBreaker
+from app.fake_gigachat import FakeGigaChat
+
+
+def q(text):
+    return {"question": text, "options": ("а", "б", "в", "г"), "correct": 0}
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    # Подменяет одну партию: reply(n, part) -> список вопросов; вызовы
+    # (размер, номер партии) копятся в calls. Партии идут в потоках tpool.
+    calls, lock = [], threading.Lock()
+    monkeypatch.setattr(ai_client, "GEN_BATCH_SIZE", 10)
+    monkeypatch.setattr(ai_client, "GEN_BATCH_CONCURRENCY", 3)
+
+    def use(reply):
+        def batch(topic, n, difficulty, num_options, part=None):
+            with lock:
+                calls.append((n, part))
+            return reply(n, part)
+        monkeypatch.setattr(ai_client, "_generate_batch", batch)
+        return calls
+    return use
+
+
+def test_duplicates_across_batches_dropped(batches):
+    # Каждая партия первой волны начинает с тех же вопросов: в итоге они по
+    # разу, а потерянное на повторах закрывает дозапрос.
+    seq = iter(range(1000))
+    common = [q("Общий вопрос 1"), q("ОБЩИЙ  вопрос 1"), q("Общий вопрос 2")]
+    calls = batches(lambda n, part: ((common if len(calls) <= 3 else [])
+                                     + [q(f"Вопрос №{next(seq)}") for _ in range(n)])[:n])
+    qs = ai_client._generate_batched("т", 30, "medium", 4, [])
+    assert sorted(n for n, _ in calls[3:]) == [1, 3, 3]
+    keys = [ai_client._qkey(x) for x in qs]
+    assert len(keys) == len(set(keys))
+    assert keys.count("общий вопрос 1") == 1 and len(qs) == 30
+
+
+def test_only_short_batches_retried(batches):
+    calls = batches(lambda n, part: [q(f"Вопрос {part} из {n} №{i}") for i in range(n if part != (2, 3) else 6)])
+    qs = ai_client._generate_batched("т", 30, "medium", 4, [])
+    assert sorted(calls[:3]) == [(10, (1, 3)), (10, (2, 3)), (10, (3, 3))]
+    assert calls[3:] == [(4, (1, 1))]
+    assert len(qs) == 30
+
+
+def test_shared_deadline(batches, monkeypatch):
+    # Бюджет 0.5 с на всё: медленная партия не держит результат, дозапрос
+    # после дедлайна не начинается, а её гринлет остаётся в running.
+    monkeypatch.setenv("GEN_BUDGET", "0.5")
+
+    def reply(n, part):
+        if part == (1, 3):
+            time.sleep(1.5)
+        return [q(f"Вопрос {part} №{i}") for i in range(n)]
+    calls = batches(reply)
+    running = []
+    t0 = time.monotonic()
+    qs = ai_client._generate_batched("т", 30, "medium", 4, running)
+    assert time.monotonic() - t0 < 1.0
+    assert len(qs) == 20 and len(calls) == 3
+    assert any(not gt.dead for gt in running)
+    for gt in running:
+        gt.wait()
+
+
+def test_batches_against_fake_gigachat(monkeypatch):
+    # Целиком через HTTP: повторы тем и битые вопросы отсеяны, недобор
+    # закрыт дозапросом.
+    fake = FakeGigaChat(pool=60, bad=0.1).start()
+    for k, v in fake.env().items():
+        monkeypatch.setenv(k, v)
+    monkeypatch.setattr(ai_client, "_client", None)
+    monkeypatch.setattr(ai_client, "_breaker", _CircuitBreaker(3, 30))
+    monkeypatch.setattr(ai_client, "GEN_BATCH_SIZE", 10)
+    try:
+        qs = ai_client.generate_questions("Космос", 30, "medium", 4, fallback=False)
+    finally:
+        ai_client._client.close()
+        fake.stop()
+    keys = {ai_client._qkey(x) for x in qs}
+    assert len(keys) == len(qs) > 0
+    assert all(len(set(x["options"])) == 4 for x in qs)
+    assert fake.chats > 3
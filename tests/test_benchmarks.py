@@ -0,0 +1,47 @@
+import pytest
+from app.simulate import hot_paths, release, team_fanout, play_game
+
+# Замеры горячих путей из app/simulate.py через pytest-benchmark;
+# без плагина модуль пропускается. Быстрый прогон без замеров:
+# python -m pytest --benchmark-disable.
+pytest.importorskip("pytest_benchmark")
+
+_room, PATHS = hot_paths(200)
+release(_room)
+
+
+@pytest.fixture(scope="module")
+def paths():
+    room, fns = hot_paths(200)
+    yield {label: fn for label, fn, _ in fns}
+    release(room)
+
+
+@pytest.mark.parametrize("label", [label for label, _, _ in PATHS],
+                         ids=[label.split()[0] for label, _, _ in PATHS])
+def test_hot_path(benchmark, paths, label):
+    benchmark.group = "hot paths (200 players)"
+    benchmark(paths[label])
+
+
+@pytest.mark.parametrize("mode", ["classic", "ffa", "team", "audience"])
+def test_play_game(benchmark, mode):
+    benchmark.group = "play_game (10 players, 20 questions)"
+    result = benchmark(play_game, mode, players=10, questions=20)
+    assert len(result["players"]) == 10
+
+
+@pytest.fixture(scope="module")
+def fan():
+    room, unicast, per_team, sent = team_fanout(2000)
+    yield unicast, per_team, sent
+    release(room)
+
+
+@pytest.mark.parametrize("how", ["unicast", "per_team"])
+def test_team_fanout(benchmark, fan, how):
+    unicast, per_team, sent = fan
+    benchmark.group = "game_started fanout (2000 players)"
+    sent[0] = 0
+    benchmark.pedantic(unicast if how == "unicast" else per_team, rounds=10, iterations=1)
+    assert sent[0] and sent[0] % 2000 == 0      # по пакету каждому игроку
@@ -0,0 +1,94 @@
+import sqlite3
+import pytest
+from app import cache as cache_mod, game_logic
+from app.cache import QuestionCache
+from app.game_logic import cache_get, cache_set
+
+
+def pool_questions(n, k=4, tag="пул"):
+    return [{"question": f"Вопрос {tag} №{i}?", "options": tuple(f"{tag}{i}-{j}" for j in range(k)),
+             "correct": 1} for i in range(n)]
+
+
+def test_hit_converts_only_returned_questions(monkeypatch):
+    cache_set(("Пул конверсии", 200, "easy", 4), pool_questions(200))
+    calls = []
+    real = game_logic.adapt_options
+
+    def counted(q, num_options):
+        calls.append(q["question"])
+        return real(q, num_options)
+    monkeypatch.setattr(game_logic, "adapt_options", counted)
+
+    qs = cache_get(("Пул конверсии", 5, "easy", 3))
+    assert len(qs) == 5 and all(len(q["options"]) == 3 for q in qs)
+    assert len(calls) == 5
+    assert len({q["question"] for q in qs}) == 5
+    assert len(cache_get(("Пул конверсии", 5, "easy", 4))) == 5 and len(calls) == 5
+
+
+class Clock:
+    # Подменяет time в app.cache: часы двигает тест.
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(cache_mod, "time", c)
+    return c
+
+
+def test_lru_evicts_by_question_count(clock):
+    c = QuestionCache(ttl=60, max_questions=10)
+    c.set("a", [1, 2, 3, 4])
+    c.set("b", [1, 2, 3])
+    c.set("c", [1, 2, 3])
+    assert c.get("a") == [1, 2, 3, 4]          # a теперь самая свежая
+    c.set("d", [1, 2])                          # 12 > 10: вытесняется b
+    assert c.get("b") is None and c.get("a") and c.get("c") and c.get("d")
+    assert c.info()["questions"] == 9 and c.stats["evictions"] == 1
+    c.set("big", list(range(50)))               # одна запись больше лимита остаётся одна
+    assert len(c) == 1 and c.get("big")
+
+
+def test_ttl_expiry(clock):
+    c = QuestionCache(ttl=60, max_questions=100)
+    c.set("a", [1])
+    clock.now += 30
+    c.set("b", [2])
+    clock.now += 31
+    assert c.peek("a") is None and c.get("a") is None
+    assert c.get("b") == [2] and c.stats["expired"] == 1
+    clock.now += 30
+    assert c.purge_expired() == 1 and len(c) == 0
+
+
+def test_sqlite_survives_restart(tmp_path, clock):
+    db = str(tmp_path / "cache.sqlite3")
+    c = QuestionCache(ttl=60, max_questions=100, db_path=db)
+    c.set(("космос", "easy"), [{"question": "Q?", "options": ("a", "b"), "correct": 0}])
+    c.set(("старое", "easy"), [{"question": "Old?", "options": ("a", "b"), "correct": 1}])
+
+    clock.now += 10
+    fresh = QuestionCache(ttl=60, max_questions=100, db_path=db,
+                          decode=lambda qs: [{**q, "decoded": True} for q in qs])
+    assert fresh.get(("космос", "easy")) == [{"question": "Q?", "options": ["a", "b"], "correct": 0,
+                                               "decoded": True}]
+    assert fresh.stats["disk_hits"] == 1
+    fresh.get(("космос", "easy"))
+    assert fresh.stats["hits"] == 1             # второй раз — из памяти
+
+    clock.now += 55                             # записи на диске старше TTL
+    assert QuestionCache(ttl=60, max_questions=100, db_path=db).get(("старое", "easy")) is None
+    assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM questions").fetchone()[0] == 0
+
+
+def test_unusable_db_falls_back_to_memory(tmp_path):
+    c = QuestionCache(ttl=60, max_questions=100, db_path=str(tmp_path))   # каталог, а не файл
+    c.set("a", [1])
+    assert c.get("a") == [1] and c.db_path is None
@@ -0,0 +1,50 @@
+import eventlet
+from conftest import settle
+from app import socket_events as se
+from app.ai_client import fallback_questions
+from app.game_logic import rooms
+from app.topics import normalize_topic
+
+TOPIC = "Квазикристаллы Шехтмана"
+
+
+def test_identical_starts_share_one_generation(make_room, monkeypatch, app):
+    calls = []
+
+    def slow(topic, count, difficulty, num_options, on_queue=None, fallback=True):
+        calls.append(topic)
+        eventlet.sleep(0.3)
+        return fallback_questions(topic, count, difficulty, num_options)
+    monkeypatch.setattr(se, "generate_questions_pooled", slow)
+    before = dict(se.flight_stats)
+
+    made = [make_room(2, topic=TOPIC, question_count=5) for _ in range(4)]
+    for cs, _ in made:
+        cs[0].emit("start_game", {})
+    settle(lambda: all(rooms[code].state == "playing" for _, code in made))
+    assert all(rooms[code].state == "playing" for _, code in made)
+
+    key = (normalize_topic(TOPIC), 5, "medium", 4)
+    assert calls == [TOPIC]
+    assert se.flight_keys[key] == {"generated": 1, "coalesced": 3}
+    assert se.flight_stats["generated"] - before["generated"] == 1
+    assert se.flight_stats["coalesced"] - before["coalesced"] == 3
+
+    top = app.test_client().get("/health").get_json()["generation"]["top"]
+    assert {"topic": key[0], "count": 5, "difficulty": "medium", "num_options": 4,
+            "generated": 1, "coalesced": 3} in top
+    text = app.test_client().get("/metrics").get_data(as_text=True)
+    assert f'topic="{key[0]}",count="5",difficulty="medium",options="4",result="coalesced"}} 3' in text
+
+
+def test_flight_keys_bounded(monkeypatch):
+    monkeypatch.setattr(se, "flight_keys", {})
+    monkeypatch.setattr(se, "FLIGHT_KEYS_MAX", 3)
+    monkeypatch.setattr(se, "flight_stats", {"generated": 0, "coalesced": 0})
+    for _ in range(3):
+        se._count_flight("частая", "coalesced")
+    for k in ("a", "b", "c", "d"):
+        se._count_flight(k, "generated")
+    assert len(se.flight_keys) == 3 and "частая" in se.flight_keys
+    assert se.flight_top(1) == [("частая", {"generated": 0, "coalesced": 3})]
+    assert se.flight_stats == {"generated": 4, "coalesced": 3}
@@ -0,0 +1,80 @@
+import random
+import pytest
+from app.game_logic import Room, _rank_key, _sid_room
+
+
+def scan(room):
+    # То же, что ведут счётчики Room, но полным обходом игроков.
+    ps = list(room.players.values())
+    sizes, answered, totals, hist = {}, {}, {1: 0, 2: 0}, {}
+    for p in ps:
+        sizes[p.team] = sizes.get(p.team, 0) + 1
+        if p.answered:
+            answered[p.team] = answered.get(p.team, 0) + 1
+            hist[p.answer_index] = hist.get(p.answer_index, 0) + 1
+        if p.team in totals:
+            totals[p.team] += p.score
+    if room.mode == "team":
+        everyone = answered.get(room.turn_team, 0) >= sizes.get(room.turn_team, 0)
+    else:
+        everyone = sum(answered.values()) >= len(ps)
+    return {
+        "team_sizes": sizes, "team_answered": answered, "team_totals": totals,
+        "answered_count": sum(answered.values()), "answer_hist": hist,
+        "binary_count": sum(p.binary for p in ps), "all_answered": everyone,
+        "ranked": sorted(ps, key=_rank_key),
+    }
+
+
+def counters(room):
+    nz = lambda d: {k: v for k, v in d.items() if v}
+    return {
+        "team_sizes": nz(room.team_sizes), "team_answered": nz(room.team_answered),
+        "team_totals": room.team_totals, "answered_count": room.answered_count,
+        "answer_hist": nz(room.answer_hist), "binary_count": room.binary_count,
+        "all_answered": room.all_answered(), "ranked": list(room.ranked()),
+    }
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("mode", ["classic", "ffa", "team", "audience"])
+def test_counters_match_full_scan(mode, seed):
+    rng = random.Random(f"{mode}-{seed}")
+    room = Room(code=f"PROP{seed:02d}", host_sid="s0", settings={"game_mode": mode})
+    room.questions = [{"question": f"q{i}", "options": ("a", "b", "c", "d"), "correct": 0} for i in range(1000)]
+    room.state = "playing"
+    next_sid = 0
+
+    for step in range(400):
+        sids = list(room.players)
+        op = rng.random()
+        if op < .2 or not sids:
+            room.add_player(f"s{next_sid}", f"p{next_sid}", rng.random() < .3)
+            next_sid += 1
+        elif op < .3:
+            room.remove_player(rng.choice(sids))
+        elif op < .33 and sids:
+            # Повторный вход того же sid (add_player поверх существующего).
+            sid = rng.choice(sids)
+            room.add_player(sid, "again", rng.random() < .5)
+        elif op < .6:
+            sid = rng.choice(sids)
+            ans = rng.randrange(-1, 4)
+            if room.record_answer(sid, ans, room.q_start_time + rng.random() * 30):
+                if ans == 0:
+                    room.award_point(sid)
+                else:
+                    room.reset_streak(sid)
+        elif op < .63:
+            room.assign_teams()
+        elif op < .7:
+            room.advance_question()
+        elif op < .72:
+            room.reset_answers()
+        else:
+            room.award_point(rng.choice(sids))
+        assert counters(room) == scan(room), f"шаг {step}"
+
+    for sid in list(room.players):
+        room.remove_player(sid)
+    assert not [s for s, c in _sid_room.items() if c == room.code]
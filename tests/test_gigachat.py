@@ -0,0 +1,87 @@
+import time
+import pytest
+from app import ai_client
+from app.ai_client import CircuitOpen, _CircuitBreaker
+from app.fake_gigachat import FakeGigaChat
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    # Подставной GigaChat на localhost, свежий клиент и breaker: 2 ошибки
+    # открывают цепь, проба — через 0.2 с.
+    fake = FakeGigaChat().start()
+    for k, v in fake.env().items():
+        monkeypatch.setenv(k, v)
+    monkeypatch.setattr(ai_client, "_client", None)
+    monkeypatch.setattr(ai_client, "_breaker", _CircuitBreaker(2, 0.2))
+    yield fake
+    if ai_client._client:
+        ai_client._client.close()
+    fake.stop()
+
+
+def call(n=3):
+    return ai_client._call_gigachat("Космос", n, "medium", 4)
+
+
+def test_token_reused_across_calls(fake):
+    for _ in range(3):
+        assert len(call()) == 3
+    assert len(list(ai_client._stream_gigachat("Космос", 3, "medium", 4))) == 3
+    assert fake.tokens == 1 and fake.chats == 4
+
+
+def test_token_refreshed_when_expiring(fake):
+    fake.token_ttl = 30          # меньше запаса token_expiry_buffer_ms клиента
+    call()
+    call()
+    assert fake.tokens == 2 and fake.unauthorized == 0
+
+
+def test_breaker_open_half_open_closed(fake):
+    br = ai_client._breaker
+    fake.status = 503
+    for _ in range(2):
+        with pytest.raises(Exception):
+            call()
+    assert br.state == "open" and br.blocked()
+    with pytest.raises(CircuitOpen):
+        call()
+    assert fake.chats == 2          # открытая цепь не ходит в сеть
+
+    time.sleep(0.25)
+    assert br.state == "half_open" and not br.blocked()
+    with pytest.raises(Exception):
+        call()                       # проба упала — снова open
+    assert br.state == "open"
+
+    time.sleep(0.25)
+    fake.status = 200
+    assert len(call()) == 3
+    assert br.state == "closed" and fake.chats == 4
+
+
+def test_probe_released_when_client_fails(fake, monkeypatch):
+    br = ai_client._breaker
+    fake.status = 503
+    for _ in range(2):
+        with pytest.raises(Exception):
+            call()
+    time.sleep(0.25)
+
+    def broken():
+        raise RuntimeError("нет токена")
+    monkeypatch.setattr(ai_client, "_get_client", broken)
+    with pytest.raises(RuntimeError):
+        call()
+    with pytest.raises(RuntimeError):
+        list(ai_client._stream_gigachat("Космос", 3, "medium", 4))
+    assert not br.probing and br.state == "open"
+
+    time.sleep(0.25)
+    monkeypatch.undo()
+    for k, v in fake.env().items():
+        monkeypatch.setenv(k, v)
+    monkeypatch.setattr(ai_client, "_breaker", br)
+    fake.status = 200
+    assert len(call()) == 3 and br.state == "closed"
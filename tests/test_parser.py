@@ -0,0 +1,40 @@
+import json, os
+import pytest
+from app.ai_client import _parse_response, _fix_indexing, _fix_and_validate, _QuestionScanner
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "data", "gigachat_responses.jsonl")
+with open(CORPUS, encoding="utf-8") as f:
+    CASES = {c["case"]: c for c in map(json.loads, filter(str.strip, f))}
+
+
+def recover(text, num_options):
+    try:
+        raw = _parse_response(text, num_options)
+    except ValueError:
+        return []
+    return [q for q in (_fix_and_validate(r, num_options) for r in _fix_indexing(raw, num_options)) if q]
+
+
+def answers(qs):
+    return [(q["question"], q["options"][q["correct"]]) for q in qs]
+
+
+@pytest.mark.parametrize("case", CASES.values(), ids=list(CASES))
+def test_recovers_expected(case):
+    qs = recover(case["text"], case["num_options"])
+    assert len(qs) >= case["expected"]
+    assert all(len(q["options"]) == case["num_options"] for q in qs)
+
+
+@pytest.mark.parametrize("case", CASES.values(), ids=list(CASES))
+def test_stream_matches_whole(case):
+    sc = _QuestionScanner()
+    text, n = case["text"], case["num_options"]
+    raw = [r for i in range(0, len(text), 7) for r in sc.feed(text[i:i + 7])]
+    qs = [q for q in (_fix_and_validate(r, n) for r in _fix_indexing(raw, n)) if q]
+    assert len(qs) >= case["expected"]
+
+
+def test_one_based_is_shifted():
+    clean = answers(recover(CASES["clean"]["text"], 4))
+    assert answers(recover(CASES["one_based"]["text"], 4)) == clean
@@ -0,0 +1,89 @@
+import json, os
+from app.ai_client import _fix_and_validate, _qkey
+from app.question_bank import QuestionBank
+
+
+def line(i, topic="космос", tags=("планеты",), difficulty="easy"):
+    return json.dumps({"topic": topic, "tags": list(tags), "difficulty": difficulty,
+                       "question": f"Вопрос про космос №{i}?", "options": [f"{i}-а", f"{i}-б", f"{i}-в", f"{i}-г"],
+                       "correct": 1}, ensure_ascii=False)
+
+
+def write(path, lines, mtime):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def bank(path):
+    return QuestionBank(str(path), validate=_fix_and_validate, reload_check=0)
+
+
+def test_bad_lines_skipped(tmp_path):
+    p = tmp_path / "bank.jsonl"
+    bad = [
+        '{"topic": "космос", "tags": "планеты", "question": "Теги строкой?", "options": ["1", "2"]}',
+        '{"topic": 42, "question": "Тема числом, а не строкой?", "options": ["1", "2"]}',
+        '{"topic": "космос", "tags": [1, 2], "question": "Теги числами?", "options": ["1", "2"]}',
+        '{"difficulty": ["easy"], "question": "Сложность списком?", "options": ["1", "2"]}',
+        '["не", "объект"]',
+        '"строка"',
+        '{"question": "Без вариантов?"}',
+        '{оборванный json',
+    ]
+    write(p, [line(1)] + bad + [line(2)], 1_000_000)
+    b = bank(p)
+    assert len(b) == 2
+    assert len(b.sample("космос", 2, "easy", strict=True)) == 2
+
+
+def test_sample_without_repeats(tmp_path):
+    p = tmp_path / "bank.jsonl"
+    lines = [line(i) for i in range(10)]
+    lines += [line(i, topic="история", tags=("россия",), difficulty="hard") for i in range(10, 25)]
+    write(p, lines, 1_000_000)
+    b = bank(p)
+    for _ in range(20):
+        for qs in (b.sample("космос", 10, "easy", strict=True), b.sample("космос", 18, "easy"),
+                   b.sample("история россии", 25, "hard"), b.sample("что угодно", 40)):
+            keys = [_qkey(q) for q in qs]
+            assert len(keys) == len(set(keys))
+    assert len(b.sample("что угодно", 40)) == 25
+    assert b.sample("космос", 11, "easy", strict=True) is None
+    first = b.sample("космос", 5, "hard")
+    assert all("космос" in q["question"] for q in first)
+
+
+def test_hot_reload(tmp_path):
+    p = tmp_path / "bank.jsonl"
+    write(p, [line(i) for i in range(3)], 1_000_000)
+    b = bank(p)
+    assert len(b) == 3 and not b.covers("химия", 1, "easy")
+
+    write(p, [line(i) for i in range(3)] + [line(9, topic="химия", tags=("элементы",))], 1_000_100)
+    assert len(b) == 4 and b.covers("химия", 1, "easy")
+
+    # Битый файл (не UTF-8) не ломает выдачу: остаётся загруженный банк.
+    p.write_bytes(b"\xff\xfe\x00garbage")
+    os.utime(p, (1_000_200, 1_000_200))
+    assert len(b) == 4 and b.covers("химия", 1, "easy")
+
+    p.unlink()
+    assert len(b) == 4
+
+
+def test_bank_first_game_skips_gigachat(make_room, monkeypatch):
+    # По умолчанию игра на тему, которую банк покрывает, стартует из банка
+    # даже с ключом GigaChat — без похода в модель.
+    from conftest import start
+    from app import socket_events as se
+    from app.game_logic import rooms
+    assert se.BANK_FIRST
+    monkeypatch.setenv("GIGACHAT_CREDENTIALS", "dGVzdDp0ZXN0")
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("GigaChat не должен вызываться")
+    monkeypatch.setattr(se, "generate_questions_pooled", no_llm)
+    monkeypatch.setattr(se, "stream_questions", no_llm)
+    cs, code = make_room(2, topic="Космос", question_count=5)
+    start(cs, code)
+    assert len(rooms[code].questions) == 5
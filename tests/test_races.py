@@ -0,0 +1,137 @@
+import logging, random
+import pytest
+from conftest import received, settle, start
+from app import socket_events as se
+from app.game_logic import rooms
+
+
+def names(client):
+    return [e for e, _ in received(client)]
+
+
+def test_ffa_simultaneous_correct_answers(make_room):
+    cs, code = make_room(3, game_mode="ffa", question_count=3)
+    start(cs, code)
+    room = rooms[code]
+    q, gen = room.current_question, room.phase_gen
+    for c in cs:
+        c.get_received()
+    for c in cs:
+        c.emit("submit_answer", {"answer_index": q["correct"]})
+    se._timeout_question(code, gen)
+    se._resolve_question(room)
+    settle(lambda: room.current_q == 1 and room.phase == "question")
+    for c in cs:
+        evs = names(c)
+        assert evs.count("ffa_correct") == 1
+        assert evs.count("question_result") == 1
+        assert evs.count("new_question") == 1
+    assert sorted(p.score > 0 for p in room.players.values()) == [False, False, True]
+
+
+@pytest.mark.parametrize("timeout_first", [True, False])
+def test_timeout_and_last_answer_in_same_tick(make_room, timeout_first):
+    cs, code = make_room(3, question_count=3)
+    start(cs, code)
+    room = rooms[code]
+    gen = room.phase_gen
+    cs[0].emit("submit_answer", {"answer_index": 0})
+    cs[1].emit("submit_answer", {"answer_index": 1})
+    for c in cs:
+        c.get_received()
+    if timeout_first:
+        se._timeout_question(code, gen)
+        cs[2].emit("submit_answer", {"answer_index": 2})
+    else:
+        cs[2].emit("submit_answer", {"answer_index": 2})
+        se._timeout_question(code, gen)
+    settle(lambda: room.current_q == 1 and room.phase == "question")
+    se._timeout_question(code, gen)
+    for c in cs:
+        assert names(c).count("question_result") == 1
+    assert room.current_q == 1 and room.answered_count == 0
+
+
+def test_leave_of_last_unanswered_resolves_once(make_room):
+    cs, code = make_room(3, question_count=3)
+    start(cs, code)
+    room = rooms[code]
+    gen = room.phase_gen
+    cs[0].emit("submit_answer", {"answer_index": 0})
+    cs[1].emit("submit_answer", {"answer_index": 0})
+    for c in cs:
+        c.get_received()
+    cs[2].disconnect()
+    se._timeout_question(code, gen)
+    se._resolve_question(room)
+    settle(lambda: room.current_q == 1 and room.phase == "question")
+    for c in cs[:2]:
+        evs = names(c)
+        assert evs.count("question_result") == 1
+        assert evs.count("new_question") == 1
+
+
+@pytest.mark.parametrize("mode", ["classic", "ffa", "team", "audience"])
+def test_race_stress(make_room, caplog, mode):
+    # Вперемешку по комнатам: ответы, уходы, таймауты текущего и старого
+    # поколения, прямые повторные _resolve_question. Каждый вопрос должен
+    # завершиться ровно одним question_result у каждого клиента.
+    caplog.set_level(logging.ERROR)
+    rng = random.Random(mode)
+    games = [make_room(6, game_mode=mode, question_count=7) for _ in range(8)]
+    for cs, code in games:
+        start(cs, code)
+    live = {code: list(cs) for cs, code in games}
+    log = {id(c): [] for cs, _ in games for c in cs}
+
+    def drain(c):
+        log[id(c)] += received(c)
+
+    for _ in range(2000):
+        if all(rooms[code].phase == "over" for _, code in games):
+            break
+        for _, code in games:
+            room = rooms[code]
+            if room.phase != "question":
+                continue
+            gen = room.phase_gen
+            for _ in range(rng.randint(1, 6)):
+                r = rng.random()
+                if r < .6:
+                    rng.choice(live[code]).emit("submit_answer", {"answer_index": rng.randrange(4)})
+                elif r < .68 and len(live[code]) > 2:
+                    c = live[code].pop(rng.randrange(len(live[code])))
+                    drain(c)
+                    c.disconnect()
+                elif r < .8:
+                    se._timeout_question(code, gen)
+                elif r < .9:
+                    se._timeout_question(code, gen - 1)
+                else:
+                    se._resolve_question(room)
+        settle()
+        for cs, _ in games:
+            for c in cs:
+                if c.is_connected():
+                    drain(c)
+
+    assert all(rooms[code].phase == "over" for _, code in games)
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    for cs, code in games:
+        for c in cs:
+            evs = [(e, a) for e, a in log[id(c)] if e in ("new_question", "question_result", "game_over")]
+            numbers = [a["question_number"] for e, a in evs if e == "new_question"]
+            assert numbers == list(range(1, len(numbers) + 1))
+            # Между двумя вопросами — ровно один итог.
+            kinds = [e for e, _ in evs]
+            chunks = " ".join(kinds).split("new_question")[1:]
+            for chunk in chunks[:-1]:
+                assert chunk.split() == ["question_result"]
+            if c in live[code]:
+                assert len(numbers) == 7
+                assert chunks[-1].split() == ["question_result", "game_over"]
+            else:
+                assert chunks[-1].split().count("question_result") <= 1
+            if mode == "ffa":
+                per_q = " ".join(e for e, _ in log[id(c)] if e in ("new_question", "ffa_correct")).split("new_question")
+                assert all(chunk.split().count("ffa_correct") <= 1 for chunk in per_q)
@@ -0,0 +1,31 @@
+import eventlet
+from app.scheduler import Scheduler
+
+
+def test_replace_between_due_and_call_wins():
+    # Оба таймера созревают в одном проходе; первый успевает заменить и
+    # отменить остальные до их вызова — старые версии не должны сработать.
+    s, hits = Scheduler(), []
+
+    def first():
+        s.schedule("b", 10, hits.append, "b-new")
+        s.cancel("c")
+
+    s.schedule("a", 0, first)
+    s.schedule("b", 0, hits.append, "b-old")
+    s.schedule("c", 0, hits.append, "c")
+    eventlet.sleep(0.05)
+    assert hits == []
+    assert s.time_left("b") > 9 and s.time_left("c") is None
+    assert s.pending() == 1 and s.fired == 1
+
+
+def test_fires_in_due_order_and_counts():
+    s, hits = Scheduler(), []
+    for i, delay in enumerate((0.03, 0.01, 0.02)):
+        s.schedule(i, delay, hits.append, i)
+    s.schedule(3, 0.02, hits.append, 3)
+    s.cancel(3)
+    eventlet.sleep(0.1)
+    assert hits == [1, 2, 0]
+    assert s.pending() == 0 and s.fired == 3
@@ -0,0 +1,56 @@
+import random
+from conftest import received, settle
+from app import socketio, reaper
+from app.game_logic import rooms, _sid_room, get_room_by_sid
+
+
+def scan():
+    # Индекс sid → комната, восстановленный полным обходом комнат.
+    out = {}
+    for code, room in rooms.items():
+        for sid in room.players:
+            assert sid not in out, f"{sid} сразу в {out[sid]} и {code}"
+            out[sid] = code
+    return out
+
+
+def test_index_matches_rooms_under_random_traffic(app, make_room):
+    rng = random.Random(1)
+    clients, codes = [], []
+    for step in range(600):
+        r = rng.random()
+        live = [c for c in clients if c.is_connected()]
+        if r < .15 or not live:
+            c = socketio.test_client(app)
+            clients.append(c)
+            c.emit("create_room", {"player_name": f"c{step}"})
+            codes += [a["room_code"] for e, a in received(c) if e == "room_created"]
+        elif r < .45:
+            # Вход в свою же, чужую или несуществующую комнату.
+            code = rng.choice(codes + ["NOROOM"])
+            rng.choice(live).emit("join_room", {"player_name": f"j{step}", "room_code": code})
+        elif r < .55:
+            rng.choice(live).emit("create_room", {"player_name": f"r{step}"})
+        elif r < .65:
+            rng.choice(live).emit("leave_room")
+        elif r < .75:
+            rng.choice(live).disconnect()
+        elif r < .8:
+            c = rng.choice(live)
+            c.emit("start_game", {})
+            settle()
+        elif r < .85 and rooms:
+            reaper.evict(rng.choice(list(rooms)), "idle")
+        else:
+            c = rng.choice(live)
+            c.emit("submit_answer", {"answer_index": rng.randrange(4)})
+        for c in clients:
+            if c.is_connected():
+                codes += [a["room_code"] for e, a in received(c) if e == "room_created"]
+        assert _sid_room == scan(), f"шаг {step}"
+        for sid, code in _sid_room.items():
+            assert get_room_by_sid(sid) is rooms[code]
+    for c in clients:
+        if c.is_connected():
+            c.disconnect()
+    assert not _sid_room and not rooms
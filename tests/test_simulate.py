@@ -0,0 +1,29 @@
+import random
+import pytest
+from app.game_logic import _sid_room
+from app.simulate import play_game
+
+MODES = ("classic", "ffa", "team", "audience")
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("seed", [0, 1, 42])
+def test_same_seed_same_game(mode, seed):
+    first = play_game(mode, players=9, questions=12, seed=seed)
+    random.seed(12345)             # чужое состояние модульного random не влияет
+    random.random()
+    assert play_game(mode, players=9, questions=12, seed=seed) == first
+    assert len(first["players"]) == 9
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_seeds_differ(mode):
+    games = [play_game(mode, players=9, questions=12, seed=s) for s in range(5)]
+    assert len({repr(g) for g in games}) > 1
+
+
+def test_games_leave_no_sids():
+    before = dict(_sid_room)
+    for mode in MODES:
+        play_game(mode, seed=7)
+    assert _sid_room == before
@@ -0,0 +1,56 @@
+import time
+from conftest import received, settle, start
+from app import ai_client
+from app import socket_events as se
+from app.game_logic import rooms
+
+SLOW = 1.5
+
+
+def slow_gigachat(topic, count, difficulty, num_options, batch=None):
+    # Поддельный GigaChat: блокирующий вызов на SLOW секунд (он в потоке tpool).
+    time.sleep(SLOW)
+    return [{"question": f"Вопрос номер {i} из медленного ответа модели?",
+             "options": ["Первый", "Второй", "Третий", "Четвёртый"], "correct": 0} for i in range(count)]
+
+
+def p99(xs):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * .99))]
+
+
+def test_slow_generation_does_not_stall_other_rooms(make_room, monkeypatch):
+    # Пока одна комната ждёт медленный GigaChat, остальные играют: от
+    # последнего ответа до следующего вопроса проходит таймер раскрытия,
+    # а не время генерации.
+    games = [make_room(3, question_count=50) for _ in range(5)]
+    for cs, code in games:
+        start(cs, code)
+    for cs, _ in games:
+        for c in cs:
+            c.get_received()
+
+    monkeypatch.setenv("GIGACHAT_CREDENTIALS", "test")
+    monkeypatch.setattr(se, "GEN_STREAMING", False)
+    monkeypatch.setattr(ai_client, "_call_gigachat", slow_gigachat)
+    slow_cs, slow_code = make_room(2, topic="Медленная тема", question_count=5)
+    slow_cs[0].emit("start_game", {})
+
+    lat, t_end = [], time.monotonic() + SLOW * 0.8
+    while time.monotonic() < t_end:
+        for cs, code in games:
+            if rooms[code].phase != "question":
+                continue
+            for c in cs:
+                c.emit("submit_answer", {"answer_index": 0})
+            t0 = time.monotonic()
+            settle(lambda: any(e == "new_question" for e, _ in received(cs[0])) or rooms[code].phase == "over")
+            lat.append(time.monotonic() - t0)
+            for c in cs[1:]:
+                c.get_received()
+    assert p99(lat) < 0.2, f"p99 {p99(lat) * 1000:.0f} мс"
+    assert len(lat) > 20
+    assert rooms[slow_code].state == "waiting", "генерация закончилась раньше замера"
+
+    settle(lambda: rooms[slow_code].state == "playing", timeout=SLOW * 3)
+    assert rooms[slow_code].questions[0]["question"].startswith("Вопрос номер")
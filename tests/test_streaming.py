@@ -0,0 +1,27 @@
+from conftest import received, settle, start
+from app.game_logic import rooms
+
+
+def test_stalled_stream_keeps_players_in_game(make_room):
+    # Поток отстал от игры: клиентам уходит строка статуса, а не game_loading,
+    # иначе они остались бы на экране загрузки до конца партии.
+    cs, code = make_room(2, question_count=3)
+    start(cs, code)
+    room = rooms[code]
+    room.streaming, room.expected_questions = True, 5
+    spare = room.questions[0]
+    received(cs[1])
+    for n in range(3):
+        for c in cs:
+            c.emit("submit_answer", {"answer_index": 0})
+        settle(lambda: room.current_q > n and room.phase != "reveal" or room.current_question is None)
+    settle(lambda: room.phase == "reveal" and room.current_question is None)
+    settle(timeout=0.3)
+    evs = [e for e, _ in received(cs[1])]
+    assert "game_status" in evs and "game_loading" not in evs
+    assert room.state == "playing"
+
+    room.questions.append(spare)
+    settle(lambda: room.phase == "question")
+    evs = [e for e, _ in received(cs[1])]
+    assert "new_question" in evs and "game_loading" not in evs
@@ -0,0 +1,80 @@
+import time
+import pytest
+from conftest import settle
+from app import warmer
+from app.game_logic import CACHE_TTL, pool_size
+
+HOT, COLD = "Вулканы Камчатки", "Перелётные птицы Сибири"
+
+
+@pytest.fixture
+def warm(monkeypatch):
+    # Чистое состояние прогрева; pregenerate отдаёт уникальные вопросы
+    # и запоминает, что у него просили.
+    calls = []
+
+    def fake(topic, count, difficulty, num_options):
+        calls.append((topic, count))
+        n = len(calls)
+        return [{"question": f"{topic}: вопрос {n}.{i}?", "options": ["a", "b", "c", "d"], "correct": i % 4}
+                for i in range(count)]
+    monkeypatch.setattr(warmer, "pregenerate", fake)
+    monkeypatch.setattr(warmer, "generation_idle", lambda: True)
+    monkeypatch.setattr(warmer, "_popular", {})
+    monkeypatch.setattr(warmer, "_tokens", 100.0)
+    monkeypatch.setattr(warmer, "_busy", False)
+    monkeypatch.setattr(warmer, "warm_stats", dict.fromkeys(warmer.warm_stats, 0))
+    monkeypatch.setattr(warmer, "WARM_PER_HOUR", 100.0)
+    monkeypatch.setattr(warmer, "WARM_POOL_SIZE", 20)
+    monkeypatch.setattr(warmer, "WARM_BATCH", 8)
+    monkeypatch.setenv("GIGACHAT_CREDENTIALS", "test")
+    return calls
+
+
+def run(ticks):
+    for _ in range(ticks):
+        warmer.tick()
+        settle(lambda: not warmer._busy)
+
+
+def test_fills_popular_topics_most_popular_first(warm):
+    for _ in range(3):
+        warmer.record(HOT, "hard")
+    warmer.record(COLD, "hard")
+
+    run(8)
+    # 8 + 8 + 4 до WARM_POOL_SIZE по горячей теме, потом так же по второй.
+    assert warm == [(HOT, 8), (HOT, 8), (HOT, 4), (COLD, 8), (COLD, 8), (COLD, 4)]
+    assert pool_size(HOT, "hard") == pool_size(COLD, "hard") == 20
+    assert warmer.warm_stats["runs"] == 6 and warmer.warm_stats["questions"] == 40
+
+
+def test_budget_limits_runs(warm, monkeypatch):
+    warmer.record(HOT, "easy")
+    monkeypatch.setattr(warmer, "_tokens", 1.0)
+    monkeypatch.setattr(warmer, "WARM_PER_HOUR", 1.0)   # одна порция в час
+    run(3)
+    assert warm == [(HOT, 8)] and warmer.warm_stats["skipped_budget"] == 2
+
+
+def test_refreshes_expired_pool(warm, monkeypatch):
+    warmer.record(HOT, "medium")
+    run(4)
+    assert len(warm) == 3 and pool_size(HOT, "medium") == 20
+
+    # Партии старше CACHE_TTL выпадают из пула — прогрев набирает его заново.
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + CACHE_TTL + 1)
+    assert pool_size(HOT, "medium") == 0
+    run(4)
+    assert len(warm) == 6 and pool_size(HOT, "medium") == 20
+
+
+def test_idle_only(warm, monkeypatch):
+    warmer.record(HOT, "easy")
+    monkeypatch.setattr(warmer, "generation_idle", lambda: False)
+    run(2)
+    monkeypatch.delenv("GIGACHAT_CREDENTIALS")
+    monkeypatch.setattr(warmer, "generation_idle", lambda: True)
+    run(2)
+    assert warm == [] and warmer.warm_stats["runs"] == 0
@@ -0,0 +1,114 @@
+import base64, json, os, re, shutil, subprocess
+import pytest
+from conftest import received, settle, start
+from app import socketio, wire
+from app.game_logic import Room, rooms, _sid_room
+
+# Обратная сторона — настоящий Wire.decode/expand из static/js/game.js,
+# исполняется в node (без node тесты пропускаются).
+pytestmark = [pytest.mark.skipif(not wire.available, reason="нет msgpack"),
+              pytest.mark.skipif(not shutil.which("node"), reason="нет node")]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JS = open(os.path.join(ROOT, "static", "js", "game.js"), encoding="utf-8").read()
+WIRE_JS = re.search(r"^const Wire = \{.*?^\};", JS, re.S | re.M).group(0)
+RUNNER = WIRE_JS + """
+const socket = { id: 'me' };
+let myId = null;
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+myId = input.myId;
+const out = input.items.map(([ev, b64]) => {
+    const b = Buffer.from(b64, 'base64');
+    return Wire.expand(ev, Wire.decode(b.buffer.slice(b.byteOffset, b.byteOffset + b.length)));
+});
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def expand(items, my_id=None):
+    # [(событие, байты msgpack)] -> то, что увидит обработчик на клиенте.
+    data = json.dumps({"myId": my_id, "items": [[e, base64.b64encode(b).decode()] for e, b in items]})
+    return json.loads(subprocess.run(["node", "-e", RUNNER], input=data, capture_output=True,
+                                     text=True, check=True).stdout)
+
+
+def as_json(payload):
+    return json.loads(json.dumps(payload))
+
+
+@pytest.fixture
+def room():
+    room = Room(code="WIRET", host_sid="s0", settings={"game_mode": "team"})
+    for i in range(3):
+        room.add_player(f"s{i}", f"Игрок «{i}»")
+    yield room
+    for sid in room.players:
+        _sid_room.pop(sid, None)
+
+
+def test_round_trip_every_event(room):
+    sids = list(room.players)
+    room.assign_teams()
+    for i, sid in enumerate(sids):
+        room.players[sid].score = 100 * i
+    seq = {sid: room.players[sid].seq for sid in sids}
+    players = {"players": room.players_list(), "total": 3}
+    question = {"question": {"question": "Столица Австралии?", "options": ("Сидней", "Канберра")},
+                "question_number": 2, "total_questions": 10, "time_limit": 30, "mode": "team",
+                "turn_team": 2, "team_scores": {1: 100, 2: 200}}
+    result = {"correct_index": 1, "correct_answer": "Канберра", "mode": "team", "team_scores": {1: 100, 2: 300},
+              "player_answers": {sid: {"answer": i % 2, "correct": i % 2 == 1, "streak": i} for i, sid in enumerate(sids)},
+              "scores": {sid: room.players[sid].score for sid in sids}}
+    audience = {"correct_index": 0, "correct_answer": "Да", "mode": "audience", "histogram": {0: 5, 1: 2},
+                "answered": 7, "total_players": 9, "top": [{"name": "Игрок «2»", "score": 200}]}
+    interim = {"players": [p.to_dict() for p in room.players.values()], "next_question": 6}
+    over = room.final_results()
+    events = [("player_joined", players), ("players_update", players), ("new_question", question),
+              ("question_result", result), ("question_result", audience),
+              ("interim_results", interim), ("game_over", over)]
+
+    got = expand([(e, wire.pack(e, d, room)) for e, d in events], my_id=seq[sids[1]])
+    for (event, payload), back in zip(events, got):
+        want = as_json(payload)
+        if event == "question_result" and "player_answers" in want:
+            # Вместо sid — номер игрока, свой номер превращается в socket.id.
+            key = {sid: "me" if sid == sids[1] else f"p{seq[sid]}" for sid in sids}
+            want["player_answers"] = {key[s]: a for s, a in want["player_answers"].items()}
+            want["scores"] = {key[s]: v for s, v in want["scores"].items()}
+        if event == "question_result" and "histogram" in want:
+            back["histogram"] = {str(k): v for k, v in back["histogram"].items()}
+        assert back == want, event
+
+
+def test_mixed_clients_get_same_game(app, make_room):
+    cs, code = make_room(2, question_count=2)
+    binary = socketio.test_client(app, auth={"wire": "msgpack"})
+    try:
+        binary.emit("join_room", {"player_name": "bin", "room_code": code})
+        assert rooms[code].binary_count == 1
+        for c in (*cs, binary):
+            c.get_received()
+        start(cs, code)
+        room = rooms[code]
+        for c in (*cs, binary):
+            c.emit("submit_answer", {"answer_index": 0})
+        settle(lambda: room.current_q == 1 and room.phase == "question")
+
+        plain = [(e, a) for e, a in received(cs[1]) if e in wire.ENCODERS]
+        packed = [(e, a) for e, a in received(binary) if e in wire.ENCODERS]
+        assert [e for e, _ in plain] == [e for e, _ in packed]
+        assert all(isinstance(a, dict) for _, a in plain)
+        assert all(isinstance(a, bytes) for _, a in packed)
+
+        my_id = room.players[next(s for s, p in room.players.items() if p.name == "bin")].seq
+        back = dict(zip([e for e, _ in packed], expand(packed, my_id)))
+        want = dict(plain)
+        # Поля, которых нет в JSON (turn_team вне командной игры), expand отдаёт null.
+        q = {k: v for k, v in back["new_question"].items() if v is not None or k in want["new_question"]}
+        assert q == as_json(want["new_question"])
+        res, exp = back["question_result"], as_json(want["question_result"])
+        assert res["correct_index"] == exp["correct_index"]
+        assert sorted(res["scores"].values()) == sorted(exp["scores"].values())
+        assert "me" in res["player_answers"]
+    finally:
+        binary.disconnect()
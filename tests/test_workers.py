@@ -0,0 +1,187 @@
+import json, os, subprocess, sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Воркер: тестовые клиенты Flask-SocketIO поверх настоящей локальной очереди.
+# Тестовый клиент отказывается работать с PubSubManager — проверку снимаем,
+# сама очередь (LocalQueueManager) остаётся настоящей.
+WORKER = """
+import os, sys, json, time
+os.environ.update(WORKER_COUNT="2", WORKER_INDEX="{idx}", SOCKETIO_MESSAGE_QUEUE="local://{tmp}/mq", CACHE_DB="")
+os.environ.pop("GIGACHAT_CREDENTIALS", None)
+import eventlet
+import flask_socketio.test_client as tc
+tc.PubSubManager = type("NoQueue", (), {{}})
+from app import create_app, socketio
+from app import socket_events as se
+from app.game_logic import rooms
+se.TIME_PER_Q, se.REVEAL_TIME = 0.5, 0.1
+app = create_app()
+
+def wait_file(name, timeout=15):
+    path = os.path.join("{tmp}", name)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise SystemExit("нет " + name)
+        eventlet.sleep(0.02)
+    return path
+
+def read_file(name):
+    return open(wait_file(name)).read()
+
+def put_file(name, text=""):
+    with open(os.path.join("{tmp}", name + ".tmp"), "w") as f:
+        f.write(text)
+    os.rename(os.path.join("{tmp}", name + ".tmp"), os.path.join("{tmp}", name))
+
+clients, log = {{}}, {{}}
+
+def client(name):
+    clients[name] = socketio.test_client(app)
+    log[name] = []
+    return clients[name]
+
+def pump(until, timeout=15):
+    # Собирает события; на первый вопрос все отвечают, второй истекает по таймауту.
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        eventlet.sleep(0.02)
+        for name, c in clients.items():
+            for m in c.get_received():
+                ev = (m["name"], m["args"][0] if m["args"] else None)
+                log[name].append(ev)
+                if ev[0] == "new_question" and ev[1]["question_number"] == 1:
+                    c.emit("submit_answer", {{"answer_index": 0}})
+
+def over():
+    return all(any(e == "game_over" for e, _ in evs) for evs in log.values())
+
+# Очередь начинает слушать с первым клиентом; ждём оба воркера,
+# иначе первые пересылки уйдут в пустоту.
+names = ("h", "a", "z") if {idx} == 0 else ("y", "b", "c")
+for name in names:
+    client(name)
+wait_file("mq/worker-0.sock"); wait_file("mq/worker-1.sock")
+if {idx} == 0:
+    h, a, z = (clients[n] for n in names)
+    h.emit("create_room", {{"player_name": "h"}})
+    x = next(m for m in h.get_received() if m["name"] == "room_created")["args"][0]["room_code"]
+    a.emit("join_room", {{"player_name": "a", "room_code": x}})
+    put_file("x", x)
+    y = read_file("y")
+    z.emit("join_room", {{"player_name": "z", "room_code": y}})
+    pump(lambda: len(rooms[x].players) == 4, timeout=5)
+    h.emit("update_settings", {{"game_mode": "team", "question_count": 2}})
+    h.emit("start_game", {{}})
+else:
+    y0, b, c = (clients[n] for n in names)
+    y0.emit("create_room", {{"player_name": "y"}})
+    y = next(m for m in y0.get_received() if m["name"] == "room_created")["args"][0]["room_code"]
+    put_file("y", y)
+    x = read_file("x")
+    b.emit("join_room", {{"player_name": "b", "room_code": x}})
+    c.emit("join_room", {{"player_name": "c", "room_code": x}})
+    pump(lambda: len(rooms[y].players) == 2, timeout=5)
+    y0.emit("update_settings", {{"question_count": 2}})
+    y0.emit("start_game", {{}})
+pump(over)
+owned = {{code: {{p.name: p.team for p in r.players.values()}} for code, r in rooms.items()}}
+print(json.dumps({{"log": log, "owned": owned, "x": x, "y": y}}, ensure_ascii=False))
+"""
+
+
+def run_workers(tmp):
+    procs = [subprocess.Popen([sys.executable, "-W", "ignore", "-c", WORKER.format(idx=i, tmp=tmp)],
+                              cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+             for i in (0, 1)]
+    out = []
+    for p in procs:
+        stdout, _ = p.communicate(timeout=60)
+        assert p.returncode == 0, stdout
+        out.append(json.loads(stdout.strip().splitlines()[-1]))
+    return out
+
+
+@pytest.fixture(scope="module")
+def workers(tmp_path_factory):
+    w0, w1 = run_workers(str(tmp_path_factory.mktemp("workers")))
+    return w0, w1, {**w0["log"], **w1["log"]}
+
+
+def events(log, name, event):
+    return [a for e, a in log[name] if e == event]
+
+
+def test_rooms_live_on_their_owner(workers):
+    w0, w1, _ = workers
+    assert set(w0["owned"]) == {w0["x"]} and set(w1["owned"]) == {w1["y"]}
+    assert set(w0["owned"][w0["x"]]) == {"h", "a", "b", "c"}
+    assert set(w1["owned"][w1["y"]]) == {"y", "z"}
+
+
+@pytest.mark.parametrize("name,mode", [("h", "team"), ("a", "team"), ("b", "team"), ("c", "team"),
+                                       ("y", "classic"), ("z", "classic")])
+def test_every_client_sees_its_own_game_once(workers, name, mode):
+    _, _, log = workers
+    qs = events(log, name, "new_question")
+    assert [q["question_number"] for q in qs] == [1, 2]
+    assert {q["mode"] for q in qs} == {mode}
+    assert len(events(log, name, "question_result")) == 2
+    assert len(events(log, name, "game_over")) == 1
+
+
+def test_team_channels_reach_both_workers(workers):
+    w0, _, log = workers
+    teams = w0["owned"][w0["x"]]
+    for name, team in teams.items():
+        assert [g["your_team"] for g in events(log, name, "game_started")] == [team]
+    assert sorted(teams.values()) == [1, 1, 2, 2]
+
+
+def test_timeout_resolves_for_remote_clients(workers):
+    # Второй вопрос никто не отвечает: итог по таймауту владельца должен
+    # дойти и до клиентов на другом воркере.
+    _, _, log = workers
+    for name in ("b", "c", "z"):
+        last = events(log, name, "question_result")[-1]
+        assert {a["answer"] for a in last["player_answers"].values()} == {-1}
+
+
+class RecordingQueue:
+    # Вместо LocalQueueManager: запоминает пересылки другому воркеру.
+    def __init__(self):
+        self.sent = []
+
+    def forward(self, index, event, sid, data, code=None):
+        self.sent.append((index, event, sid, code))
+
+
+def test_failed_cross_shard_join_keeps_current_room(make_room, monkeypatch):
+    from app import backend
+    from app.game_logic import rooms, get_room_by_sid
+    queue = RecordingQueue()
+    monkeypatch.setattr(backend, "WORKER_COUNT", 2)
+    monkeypatch.setattr(backend, "WORKER_INDEX", 0)
+    monkeypatch.setattr(backend, "_manager", queue)
+    cs, code = make_room(2)
+    sid = list(rooms[code].players)[1]
+    other = next(c for c in (f"NOPE{i:02d}" for i in range(100)) if backend.shard_of(c) == 1)
+
+    # Опечатка в коде: join уходит владельцу, из своей комнаты игрок не выходит.
+    cs[1].emit("join_room", {"player_name": "p1", "room_code": other})
+    assert [e for _, e, _, _ in queue.sent] == ["join_room"]
+    assert get_room_by_sid(sid) is rooms[code] and backend._sid_code[sid] == code
+
+    # Владелец комнаты не нашёл — подтверждения нет, ничего не меняется.
+    monkeypatch.setattr(backend, "WORKER_INDEX", 1)
+    backend._dispatch({"event": "join_room", "sid": sid, "code": other, "origin": 0,
+                       "data": {"player_name": "p1", "room_code": other}})
+    assert [e for _, e, _, _ in queue.sent] == ["join_room"]
+    monkeypatch.setattr(backend, "WORKER_INDEX", 0)
+    assert get_room_by_sid(sid) is rooms[code] and backend._sid_code[sid] == code
+
+    # Принятый вход: только теперь сокет выходит из старой комнаты.
+    backend._dispatch({"event": "joined", "sid": sid, "code": other, "data": None})
+    assert sid not in rooms[code].players and backend._sid_code[sid] == other
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Боевая точка входа. В отличие от run.py не запускает pip install, не
+# проверяет сеть и не поднимает dev-сервер Werkzeug:
+#
+#   gunicorn -k eventlet -w 1 -b 0.0.0.0:5000 wsgi:application
+#
+# Нужен gunicorn < 26: в 26 воркер eventlet удалён.
+# Один воркер на процесс (Socket.IO держит состояние в памяти); несколько
+# процессов — через WORKER_COUNT/WORKER_INDEX, см. README. Без gunicorn:
+# `python wsgi.py` (сервер eventlet), `python wsgi.py bench` — сравнение
+# времени старта с run.py.
+import os, re, sys, time, logging
+from importlib import metadata
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Нужны только при определённых настройках: gigachat — с ключом,
+# gunicorn — при запуске через gunicorn, msgpack — для ?wire=msgpack.
+SOFT = {"gigachat", "gunicorn", "msgpack"}
+
+
+def check_dependencies():
+    missing, soft = [], []
+    with open(os.path.join(ROOT, "requirements.txt"), encoding="utf-8") as f:
+        for line in f:
+            name = re.split(r"[<>=!~;\[ ]", line.strip(), maxsplit=1)[0]
+            if not name or name.startswith("#"):
+                continue
+            try:
+                metadata.version(name)
+            except metadata.PackageNotFoundError:
+                (soft if name.lower() in SOFT else missing).append(name)
+    if missing:
+        sys.exit(f"Не установлены зависимости: {', '.join(missing)}. "
+                 f"Выполните: pip install -r requirements.txt")
+    return soft
+
+
+soft_missing = check_dependencies()
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(ROOT, ".env"), override=False)
+
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO),
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    datefmt="%H:%M:%S",
+)
+logging.getLogger("engineio").setLevel(logging.WARNING)
+logging.getLogger("socketio").setLevel(logging.WARNING)
+if "gigachat" in soft_missing and os.getenv("GIGACHAT_CREDENTIALS"):
+    logging.getLogger(__name__).warning("⚠️ Пакет gigachat не установлен — вопросы из встроенного банка")
+
+from app import create_app, socketio
+
+application = create_app()
+
+
+def _time_to_ready(cmd, port, timeout=180):
+    import subprocess, urllib.request
+    env = {**os.environ, "PORT": str(port), "HOST": "127.0.0.1", "GIGACHAT_CREDENTIALS": ""}
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                return None
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=0.5).read()
+                return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.05)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def bench(runs=3):
+    # Время от запуска процесса до первого ответа /health.
+    cases = [("run.py", [sys.executable, "run.py"]),
+             ("wsgi.py", [sys.executable, "wsgi.py"])]
+    if "gunicorn" not in soft_missing:
+        cases.append(("gunicorn", [sys.executable, "-m", "gunicorn", "-k", "eventlet", "-w", "1",
+                                   "-b", "127.0.0.1:{port}", "wsgi:application"]))
+    for i, (label, cmd) in enumerate(cases):
+        port = 5070 + i
+        times = [_time_to_ready([c.format(port=port) for c in cmd], port) for _ in range(runs)]
+        ok = [t for t in times if t is not None]
+        best = f"{min(ok) * 1000:7.0f} мс" if ok else "не поднялся"
+        print(f"{label:10} {best}  ({len(ok)}/{runs} запусков)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["bench"]:
+        bench()
+    else:
+        socketio.run(application, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", 5000)))